@@ -7,12 +7,12 @@ Enhanced with improved timeout handling and network resilience.
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import time
+from browser_automation import BLOCKED_RESOURCE_PATTERNS, JS_FIRST_USABLE, certificate_arguments, chromedriver_path
 
 # --- Configuration ---
 PROXY_PORT = "8080"
@@ -20,10 +20,92 @@ EXERCISE_URL = "https://www.khanacademy.org/math/cc-2nd-grade-math/x3184e0ec:add
 
 # Enhanced timeout settings for network resilience
 PAGE_LOAD_TIMEOUT = 90  # Increased from default
-IMPLICIT_WAIT = 20      # Increased from default
+IMPLICIT_WAIT = 0       # Probes return immediately; explicit waits do the waiting
 EXPLICIT_WAIT = 45      # Increased for slow network connections
 ELEMENT_WAIT = 30       # For individual elements
 POPUP_WAIT = 3          # Short wait for popups
+QUESTION_DATA_WAIT = 8  # Upper bound for practice-start GraphQL calls to render a question
+START_BUTTON_WAIT = 8   # Start/Practice button after an exercise page loads
+ADVANCE_WAIT = 4        # Next/Continue fallback when a question doesn't render
+WAIT_POLL = 0.1         # Explicit-wait poll interval; Selenium's default is 0.5 s
+
+# Alternatives in priority order; one explicit wait covers them all (see first_clickable)
+START_BUTTON_SELECTORS = [
+    'button[data-test-id="start-button"]',
+    'button[data-test-id="practice-button"]',
+    'a[data-test-id="start-practice"]',
+]
+ADVANCE_BUTTON_SELECTORS = [
+    'button[data-test-id="next-question-button"]',
+    'button[data-test-id*="next"]',
+    'button[data-test-id*="continue"]',
+]
+
+# Text/number answer fields, in one query
+ANSWER_INPUT_SELECTOR = ", ".join([
+    'input[type="text"]',
+    'input[type="number"]',
+    'input[aria-label*="answer"]',
+    'input[placeholder*="answer"]',
+    '.perseus-input input',
+    '.simple-text-input input',
+    'input[data-test-id*="input"]',
+])
+
+# Clickable choice/option widgets, in one query
+ANSWER_CHOICE_SELECTOR = ", ".join([
+    '[data-test-id*="choice"]',
+    '.choice',
+    'button[data-test-id*="option"]',
+    '[role="button"][aria-label*="choice"]',
+    '.multiple-choice li button',
+    '.perseus-widget-radio .perseus-widget-radio-option',
+    '[data-test-id="radio-choice"]',
+])
+
+# Clicks the first element in scope (arguments[0]) whose text contains any of the
+# lower-cased substrings in arguments[1]; one parameterised script for every fallback
+JS_CLICK_BY_TEXT = """
+    const [scope, needles] = arguments;
+    const el = Array.from(document.querySelectorAll(scope)).find(el => {
+        const text = el.textContent.toLowerCase();
+        return needles.some(needle => text.includes(needle));
+    });
+    if (!el) return false;
+    el.click();
+    return true;
+"""
+
+# Rendered question means the practice-start GraphQL calls have completed
+QUESTION_RENDERED = EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join([
+    'input[type="radio"]', 'input[type="text"]', 'input[type="number"]',
+    '[data-test-id*="choice"]', '.perseus-widget-container', '.question-content',
+    '[data-test-id="exercise-question"]'
+])))
+
+
+def first_clickable(selectors):
+    """Condition yielding the clickable match of the earliest selector that has one."""
+    return EC.any_of(*[EC.element_to_be_clickable((By.CSS_SELECTOR, sel)) for sel in selectors])
+
+
+# Per-question conditions; stateless, so built once
+START_BUTTON_CLICKABLE = first_clickable(START_BUTTON_SELECTORS)
+CHECK_BUTTON_CLICKABLE = EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-test-id="check-answer-button"]'))
+NEXT_BUTTON_CLICKABLE = EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-test-id="next-question-button"]'))
+ADVANCE_BUTTON_CLICKABLE = first_clickable(ADVANCE_BUTTON_SELECTORS)
+SKILL_MASTERY_CONTINUE = EC.element_to_be_clickable(
+    (By.CSS_SELECTOR, 'button[data-test-id="skill-mastery-modal-continue-button"]')
+)
+
+
+def wait_for_question_data(question_data_wait):
+    """Return once a question has rendered, or after the wait's QUESTION_DATA_WAIT seconds."""
+    try:
+        question_data_wait.until(QUESTION_RENDERED)
+        return True
+    except TimeoutException:
+        return False
 
 def run_automation(exercise_url=None, max_questions=20):
     """
@@ -41,34 +123,42 @@ def run_automation(exercise_url=None, max_questions=20):
     chrome_options.add_argument(f'--proxy-server=http://127.0.0.1:{PROXY_PORT}')
     
     # Essential SSL/Certificate handling for mitmproxy
-    chrome_options.add_argument('--ignore-certificate-errors')
-    chrome_options.add_argument('--ignore-ssl-errors')
-    chrome_options.add_argument('--ignore-certificate-errors-spki-list')
-    chrome_options.add_argument('--disable-web-security')
-    chrome_options.add_argument('--allow-running-insecure-content')
-    chrome_options.add_argument('--allow-insecure-localhost')
+    for arg in certificate_arguments():
+        chrome_options.add_argument(arg)
     
     # Performance optimizations to reduce timeouts
     chrome_options.add_argument('--disable-extensions')
-    chrome_options.add_argument('--disable-plugins')
-    chrome_options.add_argument('--disable-images')  # Speed up loading
     # Do NOT disable JavaScript; Khan Academy SPA requires JS to render
-    chrome_options.add_argument('--disable-gpu')
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
     
     # Network optimization
-    chrome_options.add_argument('--aggressive-cache-discard')
     chrome_options.add_argument('--disable-background-networking')
     chrome_options.add_argument('--disable-sync')
     
     # Initialize WebDriver with enhanced timeouts
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
     
     # Set enhanced timeouts
     driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
     driver.implicitly_wait(IMPLICIT_WAIT)
     
+    # Waits built once and reused for every page and question
+    page_wait = WebDriverWait(driver, EXPLICIT_WAIT, poll_frequency=WAIT_POLL)
+    start_wait = WebDriverWait(driver, START_BUTTON_WAIT, poll_frequency=WAIT_POLL)
+    question_data_wait = WebDriverWait(driver, QUESTION_DATA_WAIT, poll_frequency=WAIT_POLL)
+    popup_wait = WebDriverWait(driver, POPUP_WAIT, poll_frequency=WAIT_POLL)
+    element_wait = WebDriverWait(driver, ELEMENT_WAIT, poll_frequency=WAIT_POLL)
+    advance_wait = WebDriverWait(driver, ADVANCE_WAIT, poll_frequency=WAIT_POLL)
+    
+    # Block images, fonts, media and trackers by URL; --disable-images no longer stops the fetches
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_RESOURCE_PATTERNS})
+        driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': False})
+    except WebDriverException as e:
+        print(f"Could not enable request blocking: {e}")
+    
     try:
         # Navigate to exercise page with retry logic
         print(f"Navigating to exercise page: {exercise_url}")
@@ -81,7 +171,7 @@ def run_automation(exercise_url=None, max_questions=20):
                 print("Page load initiated, waiting for content...")
                 
                 # Wait for basic page structure to ensure successful load
-                WebDriverWait(driver, EXPLICIT_WAIT).until(
+                page_wait.until(
                     EC.any_of(
                         EC.presence_of_element_located((By.TAG_NAME, "body")),
                         EC.presence_of_element_located((By.CSS_SELECTOR, "[data-test-id]"))
@@ -101,39 +191,26 @@ def run_automation(exercise_url=None, max_questions=20):
 
         # Try to click Start/Practice once after load so GraphQL batch prefetch triggers
         try:
-            start_buttons = [
-                'button[data-test-id="start-button"]',
-                'button[data-test-id="practice-button"]',
-                'a[data-test-id="start-practice"]',
-            ]
             clicked = False
-            for sel in start_buttons:
-                try:
-                    btn = WebDriverWait(driver, 8).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, sel))
-                    )
-                    btn.click()
-                    print(f"Clicked start button: {sel}")
-                    time.sleep(2)
-                    clicked = True
-                    break
-                except TimeoutException:
-                    continue
+            try:
+                btn = start_wait.until(START_BUTTON_CLICKABLE)
+                btn.click()
+                print("Clicked start button")
+                time.sleep(2)
+                clicked = True
+            except TimeoutException:
+                pass
             if not clicked:
                 # Fallback to text-based find via JS
-                btn = driver.execute_script(
-                    "return Array.from(document.querySelectorAll('button,a')).find(el => /start|practice/i.test(el.textContent));"
-                )
-                if btn:
-                    driver.execute_script("arguments[0].click();", btn)
+                if driver.execute_script(JS_CLICK_BY_TEXT, 'button,a', ['start', 'practice']):
                     print("Clicked start via text match")
                     time.sleep(2)
         except Exception:
             pass
 
-        # Wait longer for GraphQL calls to complete after starting practice
+        # Wait for GraphQL calls to complete after starting practice
         print("Waiting for GraphQL calls to complete...")
-        time.sleep(8)
+        wait_for_question_data(question_data_wait)
 
         # If current page is a curriculum/section page, iterate all exercise links
         try:
@@ -155,36 +232,21 @@ def run_automation(exercise_url=None, max_questions=20):
                         print(f"Opening exercise: {href}")
                         driver.get(href)
                         # Wait for page body
-                        WebDriverWait(driver, EXPLICIT_WAIT).until(
-                            EC.presence_of_element_located((By.TAG_NAME, 'body'))
-                        )
+                        page_wait.until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
                         time.sleep(2)
                         # Click Start/Practice if present to trigger practice task
                         started = False
-                        for sel in [
-                            'button[data-test-id="start-button"]',
-                            'button[data-test-id="practice-button"]',
-                            'a[data-test-id="start-practice"]',
-                        ]:
-                            try:
-                                btn = WebDriverWait(driver, 6).until(
-                                    EC.element_to_be_clickable((By.CSS_SELECTOR, sel))
-                                )
-                                btn.click(); started = True; print("Started exercise")
-                                break
-                            except TimeoutException:
-                                continue
+                        try:
+                            btn = start_wait.until(START_BUTTON_CLICKABLE)
+                            btn.click(); started = True; print("Started exercise")
+                        except TimeoutException:
+                            pass
                         if not started:
                             # Text-based fallback
-                            btn = driver.execute_script(
-                                "return Array.from(document.querySelectorAll('button,a')).find(el => /start|practice/i.test(el.textContent));"
-                            )
-                            if btn:
-                                driver.execute_script("arguments[0].click();", btn)
-                                started = True
+                            started = driver.execute_script(JS_CLICK_BY_TEXT, 'button,a', ['start', 'practice'])
                         # Allow mitm addon to capture manifest and download items
                         print("Waiting for GraphQL calls to complete...")
-                        time.sleep(8)
+                        wait_for_question_data(question_data_wait)
                         scraped += 1
                         if scraped >= max_questions:
                             break
@@ -202,9 +264,7 @@ def run_automation(exercise_url=None, max_questions=20):
             # Handle potential pop-ups before each question
             try:
                 # Look for a common modal pop-up and a continue button
-                continue_button = WebDriverWait(driver, POPUP_WAIT).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-test-id="skill-mastery-modal-continue-button"]'))
-                )
+                continue_button = popup_wait.until(SKILL_MASTERY_CONTINUE)
                 print("Found and clicked a skill mastery pop-up.")
                 continue_button.click()
                 time.sleep(2)
@@ -215,41 +275,21 @@ def run_automation(exercise_url=None, max_questions=20):
             question_loaded = False
             try:
                 # Wait for various indicators that question is loaded
-                WebDriverWait(driver, ELEMENT_WAIT).until(
-                    EC.any_of(
-                        # Interactive elements
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'input[type="radio"]')),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'input[type="text"]')),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'input[type="number"]')),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, '[data-test-id*="choice"]')),
-                        # Question content containers
-                        EC.presence_of_element_located((By.CSS_SELECTOR, '.perseus-widget-container')),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, '.question-content')),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, '[data-test-id="exercise-question"]')),
-                        # Check button as last resort
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-test-id="check-answer-button"]'))
-                    )
-                )
+                element_wait.until(EC.any_of(QUESTION_RENDERED, CHECK_BUTTON_CLICKABLE))
                 question_loaded = True
                 print("Question elements detected and loaded.")
             except TimeoutException:
                 print("Question elements not loaded in time, attempting to advance...")
                 # Try pressing Next/Continue to advance if current screen not ready
                 advanced = False
-                for sel in [
-                    'button[data-test-id="next-question-button"]',
-                    'button[data-test-id*="next"]',
-                    'button[data-test-id*="continue"]',
-                    'button[data-test-id="hint-button"]'  # Sometimes need to get hints first
-                ]:
-                    try:
-                        btn = WebDriverWait(driver, 4).until(EC.element_to_be_clickable((By.CSS_SELECTOR, sel)))
-                        btn.click(); time.sleep(3)
-                        advanced = True
-                        print(f"Clicked {sel} to advance")
-                        break
-                    except TimeoutException:
-                        continue
+                try:
+                    btn = advance_wait.until(ADVANCE_BUTTON_CLICKABLE)
+                    label = btn.get_attribute('data-test-id')
+                    btn.click(); time.sleep(3)
+                    advanced = True
+                    print(f"Clicked {label} to advance")
+                except TimeoutException:
+                    pass
                         
                 if not advanced:
                     print("No interactable elements found; skipping this iteration")
@@ -265,69 +305,28 @@ def run_automation(exercise_url=None, max_questions=20):
                     radio_buttons[0].click()
                     print("Selected a radio button.")
                     answered = True
-            except Exception as e:
+            except WebDriverException as e:
                 print(f"Radio button error: {e}")
             
             # If no radio button, try text/number inputs
             if not answered:
                 try:
-                    # Look for various input types with more selectors
-                    input_selectors = [
-                        'input[type="text"]',
-                        'input[type="number"]', 
-                        'input[aria-label*="answer"]',
-                        'input[placeholder*="answer"]',
-                        '.perseus-input input',
-                        '.simple-text-input input',
-                        'input[data-test-id*="input"]'
-                    ]
-                    
-                    input_found = None
-                    for selector in input_selectors:
-                        try:
-                            input_found = driver.find_element(By.CSS_SELECTOR, selector)
-                            if input_found.is_displayed() and input_found.is_enabled():
-                                break
-                        except:
-                            continue
-                    
-                    if input_found:
-                        input_found.clear()
-                        input_found.send_keys("1")
+                    # Find the first visible, enabled field and set its value in one call;
+                    # the native setter plus input/change events is what React listens for
+                    if driver.execute_script(JS_FIRST_USABLE, ANSWER_INPUT_SELECTOR, "1", False):
                         print(f"Entered '1' into an input field.")
                         answered = True
-                except Exception as e:
+                except WebDriverException as e:
                     print(f"Input field error: {e}")
             
             # Try clickable choices/options
             if not answered:
                 try:
-                    choice_selectors = [
-                        '[data-test-id*="choice"]',
-                        '.choice',
-                        'button[data-test-id*="option"]',
-                        '[role="button"][aria-label*="choice"]',
-                        '.multiple-choice li button',
-                        '.perseus-widget-radio .perseus-widget-radio-option',
-                        '[data-test-id="radio-choice"]'
-                    ]
-                    
-                    choice_found = None
-                    for selector in choice_selectors:
-                        try:
-                            choices = driver.find_elements(By.CSS_SELECTOR, selector)
-                            if choices:
-                                choice_found = choices[0]
-                                if choice_found.is_displayed() and choice_found.is_enabled():
-                                    break
-                        except:
-                            continue
-                    
-                    if choice_found:
-                        choice_found.click()
+                    # Misses return False instead of raising, so no per-selector handlers
+                    if driver.execute_script(JS_FIRST_USABLE, ANSWER_CHOICE_SELECTOR, None, True):
                         print("Clicked a choice option.")
                         answered = True
-                except Exception as e:
+                except WebDriverException as e:
                     print(f"Choice option error: {e}")
             
             if not answered:
@@ -341,9 +340,7 @@ def run_automation(exercise_url=None, max_questions=20):
             
             # 3. Click the "Check" button with enhanced timeout
             try:
-                check_button = WebDriverWait(driver, ELEMENT_WAIT).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-test-id="check-answer-button"]'))
-                )
+                check_button = element_wait.until(CHECK_BUTTON_CLICKABLE)
                 check_button.click()
                 print("Clicked 'Check'.")
                 time.sleep(3)
@@ -351,11 +348,7 @@ def run_automation(exercise_url=None, max_questions=20):
                 # Try alternative check button selectors (avoid unsupported CSS pseudo)
                 try:
                     # Search by text with JS
-                    js_btn = driver.execute_script(
-                        "return Array.from(document.querySelectorAll('button')).find(el => /check|submit/i.test(el.textContent));"
-                    )
-                    if js_btn:
-                        driver.execute_script("arguments[0].click();", js_btn)
+                    if driver.execute_script(JS_CLICK_BY_TEXT, 'button', ['check', 'submit']):
                         print("Clicked alternative 'Check' via text.")
                         time.sleep(3)
                     else:
@@ -365,19 +358,13 @@ def run_automation(exercise_url=None, max_questions=20):
             
             # 4. Click the "Next question" button with enhanced timeout
             try:
-                next_button = WebDriverWait(driver, ELEMENT_WAIT).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-test-id="next-question-button"]'))
-                )
+                next_button = element_wait.until(NEXT_BUTTON_CLICKABLE)
                 next_button.click()
                 print("Clicked 'Next question'.")
             except TimeoutException:
                 # Try alternative next button via text search
                 try:
-                    js_next = driver.execute_script(
-                        "return Array.from(document.querySelectorAll('button')).find(el => /next|continue/i.test(el.textContent));"
-                    )
-                    if js_next:
-                        driver.execute_script("arguments[0].click();", js_next)
+                    if driver.execute_script(JS_CLICK_BY_TEXT, 'button', ['next', 'continue']):
                         print("Clicked alternative 'Next' via text.")
                     else:
                         print("Could not find next button after extended wait, may have completed exercise.")
@@ -0,0 +1,65 @@
+"""
+Compact membership tracking for long scraping runs.
+A scalable Bloom filter that stands in for a set of question IDs when only
+"have we seen this?" is needed, at a few bytes per entry instead of a full string.
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over strings."""
+
+    def __init__(self, capacity=10000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Enhanced double hashing: derive every probe from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little")
+        return ((h1 + i * h2 + (i * i * i - i) // 6) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+class ScalableBloomFilter:
+    """Bloom filter that grows by chaining larger filters as entries are added.
+
+    Each new stage doubles capacity and halves its error rate, so the overall
+    false-positive rate stays below the requested error_rate.
+    """
+
+    def __init__(self, initial_capacity=10000, error_rate=0.001):
+        self.error_rate = error_rate
+        self.filters = [BloomFilter(initial_capacity, error_rate / 2)]
+
+    def add(self, item):
+        if item in self:
+            return
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * 2, current.error_rate / 2)
+            self.filters.append(current)
+        current.add(item)
+
+    def __contains__(self, item):
+        return any(item in f for f in self.filters)
+
+    def __len__(self):
+        return sum(len(f) for f in self.filters)
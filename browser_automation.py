@@ -5,8 +5,13 @@ and refresh the page when needed.
 """
 
 import time
+import base64
+import hashlib
 import json
 import os
+import random
+import re
+import socket
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -14,48 +19,659 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, WebDriverException,
+    StaleElementReferenceException, InvalidArgumentException
+)
 import threading
 import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from khan_signals import InterruptionListener
+from bloom_filter import ScalableBloomFilter
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Profile kept between runs so Khan Academy's JS bundles stay in the HTTP cache; resolved
+# per run (see persistent_profile_dir) and overridable with KHAN_BROWSER_PROFILE_DIR
+PERSISTENT_PROFILE_NAME = "chrome_profile_ka"
+# Symlink to "<hostname>-<pid>" that Chrome keeps in a profile it has open (Linux/macOS)
+PROFILE_LOCK_NAME = "SingletonLock"
+
+# Browser pool sizing; instances are recycled after MAX_USES_PER_INSTANCE sessions
+POOL_SIZE = int(os.environ.get("KHAN_BROWSER_POOL_SIZE", "4"))
+MAX_USES_PER_INSTANCE = 50
+
+# Run Chrome without a window (KHAN_BROWSER_HEADLESS=1); capture happens in the proxy either way
+HEADLESS = os.environ.get("KHAN_BROWSER_HEADLESS", "0") == "1"
+
+# Longest wait for the page to accept a filled-in answer before moving on regardless
+ANSWER_REGISTER_TIMEOUT = 2
+
+# Longest waits for a start button to appear and for the first question to render after it
+START_BUTTON_TIMEOUT = 10
+FIRST_QUESTION_TIMEOUT = 15
+
+# Longest wait for each step of a client-side route reset before falling back to a reload
+SOFT_RESET_TIMEOUT = 2
+
+# Longest wait for a "Try again" click to close its dialog and hand the question back
+RETRY_CLOSE_TIMEOUT = 3
+
+# Wall-clock budget for one question's answer/submit/next cycle; every wait inside it is
+# capped to what is left, so a stuck step costs at most this before recovery kicks in
+QUESTION_TIME_BUDGET = 15
+
+# Questions between INFO-level progress lines in automate_exercise_session
+PROGRESS_LOG_INTERVAL = 10
+
+# Retry backoff: 1 s, 2 s, 4 s... plus up to 1 s of jitter, capped
+BACKOFF_MAX_DELAY = 30
+
+# Whole main headings of Khan Academy / proxy error pages; matched exactly, since exercise
+# titles such as "Percent error" legitimately contain these words
+PAGE_ERROR_HEADINGS = {"404", "page not found", "not found", "access denied", "blocked", "something went wrong"}
+
+# Exercise URLs: Khan Academy host, no "..." placeholders, at least 80 characters overall
+KA_URL_PREFIX = "https://www.khanacademy.org/"
+EXERCISE_URL_RE = re.compile(r"https://www\.khanacademy\.org/(?!.*\.\.\.).{%d,}" % (80 - len(KA_URL_PREFIX)))
+
+# mitmproxy's root CA; Chrome trusts certificates chained to it by public-key pin
+MITMPROXY_CA_CERT = os.path.expanduser(os.path.join("~", ".mitmproxy", "mitmproxy-ca-cert.pem"))
+
+# ChromeDriver path resolved once per process; install() checks versions over the network
+_DRIVER_PATH = None
+_DRIVER_PATH_LOCK = threading.Lock()
+
+# Sentinel hosts answered by the mitmproxy addon to start/stop capture
+START_CAPTURE_HOST = "startlogging"
+STOP_CAPTURE_HOST = "stoplogging"
+CAPTURE_SIGNAL_TIMEOUT = 2  # Seconds to wait for the proxy to acknowledge a sentinel
+
+# Sends a capture sentinel and calls back once the proxy has answered (or failed / timed out),
+# so a following navigation or driver.quit() cannot cancel it in flight
+JS_SIGNAL_CAPTURE = """
+    const [host, target, timeoutMs, done] = arguments;
+    const settled = fetch('http://' + host + '/' + encodeURIComponent(target), {mode: 'no-cors'})
+        .then(() => true, () => false);
+    const timer = new Promise(resolve => setTimeout(() => resolve(false), timeoutMs));
+    Promise.race([settled, timer]).then(done);
+"""
+
+# Start/practice buttons, in priority order: CSS selectors first, then the whole,
+# case-insensitive label of a button-like element (so "Start over" or "Get started" don't match)
+START_BUTTON_SELECTORS = [
+    "button[data-test-id='start-button']",
+    "button[data-test-id='practice-button']",
+    "a[data-test-id='start-practice']"
+]
+START_BUTTON_TEXTS = ["start", "practice", "start practice"]
+
+# Wait conditions built once at import; each matches any selector in its compound list
+KA_CONTENT_EC = EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join([
+    "#application", "[data-test-id]", ".exercise", ".problem", "[class*='khan']"
+])))
+LOADING_INDICATOR_SELECTOR = ", ".join([
+    ".loading-spinner", "[data-test-id*='loading']",
+    ".skeleton-loader", "[aria-label*='loading']",
+    ".spinner", ".loader"
+])
+INTERACTIVE_CONTENT_SELECTOR = ", ".join([
+    "input[type='text']", "input[type='number']",
+    "input[type='radio']", "button[data-test-id*='check']",
+    "[data-test-id*='numeric-input']"
+])
+NEXT_BUTTON_SELECTOR = ", ".join([
+    "button[data-test-id='next-question']",
+    "button[data-test-id='continue']",
+    ".next-question-button",
+    "[data-test-id*='next'] button",
+    "[data-test-id*='continue'] button"
+])
+
+# Question classification selectors; dict order sets detection priority
+QUESTION_TYPE_SELECTORS = {
+    "numeric_input": "input[type='text'], input[data-test-id='numeric-input'], input[type='number']",
+    "multiple_choice": "input[type='radio'], .multiple-choice",
+    "expression": "input[data-test-id='expression-input']",
+    "graph": ".graphie, .interactive-graph",
+    "dropdown": "select, .dropdown"
+}
+
+# Any of these means question content is on the page
+QUESTION_CONTENT_SELECTOR = ", ".join([
+    "[data-test-id='exercise-content']",
+    ".problem-content",
+    ".question-content",
+    ".exercise-content",
+    ".problem",
+    ".question",
+    "[class*='question']",
+    "[class*='problem']",
+    "[class*='exercise']"
+])
+
+# Container of the current question; input lookups are scoped to it when present
+QUESTION_RENDERER_SELECTOR = "[data-test-id='exercise-question-renderer']"
+
+# Exercise content or any answerable input means a question has loaded
+QUESTION_READY_SELECTOR = ", ".join([
+    "[data-test-id='exercise-content']",
+    ".problem-content",
+    ".question-content",
+    "input[type='text']",
+    "input[type='radio']",
+    "input[type='number']",
+    "button[data-test-id='check-answer']"
+])
+
+# Inputs used by the auto_answer_question strategies
+NUMERIC_INPUT_SELECTOR = "input[type='text'], input[type='number'], input[data-test-id='numeric-input']"
+RADIO_INPUT_SELECTOR = "input[type='radio']"
+EXPRESSION_INPUT_SELECTOR = "input[data-test-id='expression-input'], .math-input"
+TEXT_INPUT_SELECTOR = "input[type='text']"
+
+# Values cycled through numeric inputs; any answer unlocks the check button
+NUMERIC_TEST_VALUES = ["5", "35", "7", "42", "10"]
+
+# Grouped selectors for the progress_to_next_question answer strategies; one query each.
+# ANSWER_PLANS below maps each question type to its strategy.
+PERSEUS_NUMERIC_SELECTOR = ", ".join([
+    "[data-test-id*='numeric-input']",
+    "input[type='number']",
+    "input[type='text'][data-test-id*='input']",
+    ".perseus-widget-numeric-input input",
+    "input[aria-label*='answer']"
+])
+PERSEUS_RADIO_SELECTOR = ", ".join([
+    "input[type='radio']",
+    ".multiple-choice input",
+    "[data-test-id*='choice'] input",
+    ".answer-choice input"
+])
+PERSEUS_EXPRESSION_SELECTOR = ", ".join([
+    "input[data-test-id*='expression']",
+    ".math-input input",
+    "[data-test-id*='math'] input"
+])
+GENERIC_INPUT_SELECTOR = ", ".join([
+    "input[type='text']:not([readonly])",
+    "input[type='number']:not([readonly])",
+    "input[type='radio']",
+    "textarea:not([readonly])"
+])
+
+# Next-question buttons tried by simulate_question_interaction before matching "next" text
+NEXT_QUESTION_SELECTORS = [
+    "button[data-test-id='next-question']",
+    ".next-button",
+    "button[aria-label*='Next']",
+    "button[title*='Next']"
+]
+
+# Elements counted by _check_khan_academy_content as evidence of a rendered page
+KA_CONTENT_SELECTORS = [
+    "#application",
+    "[data-test-id]",
+    ".exercise",
+    ".problem",
+    ".question",
+    "[class*='khan']",
+    "div[role='main']",
+    "main"
+]
+
+# Check/submit buttons, tried before matching CHECK_ANSWER_TEXTS
+CHECK_ANSWER_SELECTORS = [
+    "button[data-test-id='check-answer-button']",
+    "button[data-test-id='check-answer']",
+    "button[data-test-id='check']",
+    "button.check-answer-button",
+    "[data-test-id*='check'] button"
+]
+CHECK_ANSWER_TEXTS = ["Check", "Submit"]
+
+# How progress_to_next_question answers each question type: [selector, values, mode]
+ANSWER_PLANS = {
+    "numeric_input": [PERSEUS_NUMERIC_SELECTOR, NUMERIC_TEST_VALUES, "all"],
+    "multiple_choice": [PERSEUS_RADIO_SELECTOR, [], "click"],
+    "expression": [PERSEUS_EXPRESSION_SELECTOR, ["x"], "first"],
+    "generic": [GENERIC_INPUT_SELECTOR, ["1"], "all"]
+}
+
+# Dialog buttons, grouped so each handler finds its button with one query
+RESTART_BUTTON_SELECTOR = "button[data-test-id='restart'], a[href*='restart']"
+DISMISS_BUTTON_SELECTOR = ", ".join([
+    "button[data-test-id='continue']",
+    "button[data-test-id='dismiss']",
+    ".modal button"
+])
+CLOSE_HINT_SELECTOR = ", ".join([
+    "button[data-test-id='close-hint']",
+    "button[data-test-id='skip-hint']",
+    ".hint-dialog button"
+])
+ERROR_OK_SELECTOR = ", ".join([
+    "button[data-test-id='ok']",
+    "button[data-test-id='dismiss']",
+    ".error-dialog button"
+])
+RETRY_BUTTON_SELECTOR = "button[data-test-id='try-again'], button[data-test-id='retry']"
+RESTART_BUTTON_TEXTS = ["start over", "restart"]
+DISMISS_BUTTON_TEXTS = ["continue"]
+RETRY_BUTTON_TEXTS = ["try again", "continue"]
+
+# Button texts that advance to the next question
+PROGRESS_TEXTS = ["next", "continue"]
+
+# Next/continue buttons used by attempt_to_progress_to_next_question
+PROGRESS_SELECTORS = [
+    "button[data-test-id='next-question']",
+    "button[data-test-id='continue']",
+    "a[data-test-id='next-question']",
+    ".next-button",
+    ".continue-button"
+]
+
+# Focusable question elements, used to nudge lazy-loaded content
+INTERACTIVE_SELECTOR = ", ".join([
+    "input[type='text']",
+    "input[type='number']",
+    ".radio input",
+    ".multiple-choice input",
+    "button[data-test-id='check-answer']",
+    ".btn-primary"
+])
+
+# Clicks the first start button by CSS selector (arguments[0]) or text (arguments[1]),
+# watching DOM mutations until one appears or arguments[2] ms elapse
+JS_CLICK_START_BUTTON = """
+    const [selectors, texts, timeoutMs] = arguments;
+    const done = arguments[arguments.length - 1];
+    const tryClick = () => {
+        for (const sel of selectors) {
+            const el = document.querySelector(sel);
+            if (el) { el.click(); return sel; }
+        }
+        const candidates = Array.from(document.querySelectorAll("button, [role='button']"));
+        for (const text of texts) {
+            const el = candidates.find(el => el.textContent.trim().toLowerCase() === text);
+            if (el) { el.click(); return text; }
+        }
+        return null;
+    };
+    const first = tryClick();
+    if (first) return done(first);
+    const observer = new MutationObserver(() => {
+        const hit = tryClick();
+        if (hit) { observer.disconnect(); clearTimeout(timer); done(hit); }
+    });
+    observer.observe(document.body || document.documentElement, {subtree: true, childList: true});
+    const timer = setTimeout(() => { observer.disconnect(); done(null); }, timeoutMs);
+"""
+
+# Resolves true as soon as an element matches arguments[0], re-checking on every DOM
+# mutation, or false after arguments[1] ms
+JS_WAIT_FOR_SELECTOR = """
+    const [selector, timeoutMs] = arguments;
+    const done = arguments[arguments.length - 1];
+    if (document.querySelector(selector)) return done(true);
+    const observer = new MutationObserver(() => {
+        if (document.querySelector(selector)) { observer.disconnect(); clearTimeout(timer); done(true); }
+    });
+    observer.observe(document.body || document.documentElement, {subtree: true, childList: true});
+    const timer = setTimeout(() => { observer.disconnect(); done(false); }, timeoutMs);
+"""
+
+# Counts in-flight fetch/XHR requests in window.__kaNet.inflight and notifies its listeners
+# on every start and end; installed with the page helpers, at document start
+JS_TRACK_INFLIGHT = """
+(() => {
+    if (window.__kaNet) return;
+    const net = window.__kaNet = {inflight: 0, listeners: new Set()};
+    const changed = () => net.listeners.forEach(listener => listener());
+    const start = () => { net.inflight++; changed(); };
+    const end = () => { net.inflight = Math.max(0, net.inflight - 1); changed(); };
+    const fetch = window.fetch;
+    if (fetch) {
+        window.fetch = function () {
+            start();
+            try { return fetch.apply(this, arguments).finally(end); } catch (e) { end(); throw e; }
+        };
+    }
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        start();
+        this.addEventListener('loadend', end, {once: true});
+        try { return send.apply(this, arguments); } catch (e) { end(); throw e; }
+    };
+})();
+"""
+# Resolves true once no fetch/XHR has been in flight and no resource has finished for
+# arguments[0] ms (Chrome's networkIdle heuristic, observed in-page), or false after arguments[1] ms
+JS_WAIT_FOR_NETWORK_IDLE = """
+    const [quietMs, timeoutMs] = arguments;
+    const done = arguments[arguments.length - 1];
+    const net = window.__kaNet || {inflight: 0, listeners: new Set()};
+    let timer = null;
+    // Restart the quiet period on any activity; only count it while nothing is in flight
+    const arm = () => {
+        clearTimeout(timer);
+        timer = net.inflight === 0 ? setTimeout(() => finish(true), quietMs) : null;
+    };
+    const observer = new PerformanceObserver(arm);
+    const finish = idle => {
+        observer.disconnect(); net.listeners.delete(arm);
+        clearTimeout(timer); clearTimeout(deadline); done(idle);
+    };
+    observer.observe({type: 'resource'});
+    net.listeners.add(arm);
+    const deadline = setTimeout(() => finish(false), timeoutMs);
+    arm();
+"""
+
+# Returns the first enabled, rendered element matching any CSS selector (arguments[0]) or,
+# failing that, any element in scope (arguments[2]) whose text contains one of arguments[1]
+JS_FIND_FIRST_ENABLED = """
+    const [selectors, texts, scope] = arguments;
+    const usable = el => !el.disabled && el.offsetParent !== null;
+    for (const sel of selectors) {
+        const el = Array.from(document.querySelectorAll(sel)).find(usable);
+        if (el) return el;
+    }
+    const candidates = Array.from(document.querySelectorAll(scope)).filter(usable);
+    for (const text of texts) {
+        const needle = text.toLowerCase();
+        const el = candidates.find(el => el.textContent.toLowerCase().includes(needle));
+        if (el) return el;
+    }
+    return null;
+"""
+# Finds the first rendered, enabled element among arguments[0] (a selector or an element
+# list) and fills it with arguments[1] or, if that is null and arguments[2] is set, clicks it.
+# Only real <input>/<textarea> elements are filled; wrappers a selector also matches are skipped
+JS_FIRST_USABLE = """
+    const [candidates, fillValue, click] = arguments;
+    const els = typeof candidates === 'string' ? document.querySelectorAll(candidates) : candidates;
+    for (const el of els) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0 || el.disabled) continue;
+        if (fillValue !== null) {
+            if (!(el instanceof HTMLInputElement || el instanceof HTMLTextAreaElement)) continue;
+            const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+            el.focus();
+            Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, fillValue);
+            el.dispatchEvent(new Event('input', {bubbles: true}));
+            el.dispatchEvent(new Event('change', {bubbles: true}));
+        } else if (click) {
+            el.click();
+        }
+        return true;
+    }
+    return false;
+"""
+# Same lookup as JS_FIND_FIRST_ENABLED, but clicks the match in the same call
+JS_CLICK_FIRST_ENABLED = "const el = (() => {" + JS_FIND_FIRST_ENABLED + """})();
+    if (el) el.click();
+    return !!el;
+"""
+
+# Fills the first usable text input (arguments[0]) with arguments[2] or, failing that,
+# clicks the first usable radio (arguments[1]); returns which one it used.
+# Runs as a window.__ka helper, so it can reuse firstUsable.
+JS_ANSWER_GENERIC = """
+    const [texts, radios, value] = arguments;
+    if (window.__ka.firstUsable(texts, value, false)) return 'text';
+    if (window.__ka.firstUsable(radios, null, true)) return 'radio';
+    return null;
+"""
+
+# Match count per selector in arguments[0], plus the trimmed length of the page text
+JS_PROBE = """
+    const counts = arguments[0].map(sel => document.querySelectorAll(sel).length);
+    const text = document.body ? (document.body.textContent || '').trim().length : 0;
+    return [counts, text];
+"""
+
+# Any structural element; a handful of these means the page rendered something
+PAGE_STRUCTURE_SELECTOR = "div, span, p, h1, h2, h3, article, section, main"
+
+# Resolves once arguments[0] matches and nothing matches arguments[1] (loading
+# indicators), re-checking on each DOM change, or false after arguments[2] ms
+JS_WAIT_FOR_INTERACTIVE = """
+    const [readySelector, busySelector, timeoutMs] = arguments;
+    const done = arguments[arguments.length - 1];
+    const ready = () => !document.querySelector(busySelector) && !!document.querySelector(readySelector);
+    if (ready()) return done(true);
+    const observer = new MutationObserver(() => {
+        if (ready()) { observer.disconnect(); clearTimeout(timer); done(true); }
+    });
+    observer.observe(document.body || document.documentElement,
+                     {subtree: true, childList: true, attributes: true, attributeFilter: ['class', 'aria-label']});
+    const timer = setTimeout(() => { observer.disconnect(); done(ready()); }, timeoutMs);
+"""
+
+# Identifies the question on screen so a change of question can be awaited
+JS_CURRENT_QUESTION_ID = """
+    const renderer = document.querySelector("[data-test-id='exercise-question-renderer']");
+    if (renderer && renderer.getAttribute('data-qid')) return renderer.getAttribute('data-qid');
+    const content = document.querySelector(arguments[0]);
+    return content ? content.innerText.slice(0, 200) : null;
+"""
+
+# Interruption detection and dismissal in priority order:
+# (page text that identifies it, dismiss button selector, dismiss button texts)
+INTERRUPTION_RULES = [
+    ("practice complete", RESTART_BUTTON_SELECTOR, RESTART_BUTTON_TEXTS),
+    ("congratulations", RESTART_BUTTON_SELECTOR, RESTART_BUTTON_TEXTS),
+    ("streak", DISMISS_BUTTON_SELECTOR, DISMISS_BUTTON_TEXTS),
+    ("hint", CLOSE_HINT_SELECTOR, []),
+    ("error", ERROR_OK_SELECTOR, []),
+    ("try again", RETRY_BUTTON_SELECTOR, RETRY_BUTTON_TEXTS)
+]
+
+# Dismiss button (selector, texts) for each interruption kind
+DIALOG_BUTTONS = {kind: (selector, texts) for kind, selector, texts in INTERRUPTION_RULES}
+
+# Detects the first matching interruption rule and clicks its first visible, enabled
+# dismiss button in one pass
+JS_RESOLVE_INTERRUPTION = """
+    const text = (document.body ? document.body.innerText : '').toLowerCase();
+    const usable = el => !el.disabled && el.offsetParent !== null;
+    for (const [key, selector, texts] of arguments[0]) {
+        if (!text.includes(key)) continue;
+        let el = Array.from(document.querySelectorAll(selector)).find(usable);
+        if (!el && texts.length) {
+            el = Array.from(document.querySelectorAll('button, a')).filter(usable).find(e =>
+                texts.some(t => e.textContent.toLowerCase().includes(t)));
+        }
+        if (el) el.click();
+        return {kind: key, clicked: !!el};
+    }
+    return null;
+"""
+
+# Fills every rendered, enabled <input>/<textarea> among arguments[0] (a selector or an
+# element list), cycling through the values in arguments[1], and clicks only the first
+# usable radio; returns how many it answered
+JS_FILL_ALL_USABLE = """
+    const [candidates, values] = arguments;
+    const els = typeof candidates === 'string' ? document.querySelectorAll(candidates) : candidates;
+    let answered = 0, radioClicked = false;
+    for (const el of els) {
+        if (!(el instanceof HTMLInputElement || el instanceof HTMLTextAreaElement)) continue;
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0 || el.disabled) continue;
+        if (el.type === 'radio') {
+            // One choice per radio group is enough
+            if (!radioClicked) { el.click(); radioClicked = true; answered++; }
+            continue;
+        }
+        const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        el.focus();
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, values[answered % values.length]);
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        answered++;
+    }
+    return answered;
+"""
+# Classifies the question by the first matching [type, selector] in arguments[0] and
+# answers it with that type's [selector, values, mode] plan from arguments[1]; modes are
+# 'all' (fill every input), 'first' (fill one) and 'click'. Returns [type, answered].
+JS_ANSWER_BY_TYPE = """
+    const [types, plans] = arguments;
+    const match = types.find(([, sel]) => document.querySelector(sel));
+    const type = match && plans[match[0]] ? match[0] : 'generic';
+    const [selector, values, mode] = plans[type];
+    const answered = mode === 'all'
+        ? window.__ka.fillAllUsable(selector, values) > 0
+        : window.__ka.firstUsable(selector, mode === 'click' ? null : values[0], mode === 'click');
+    return [type, answered];
+"""
+# Page helpers installed once per document as window.__ka, so each call only ships
+# "return window.__ka.<name>(...arguments)" instead of the full script source
+KA_HELPERS = {
+    "findFirstEnabled": JS_FIND_FIRST_ENABLED,
+    "clickFirstEnabled": JS_CLICK_FIRST_ENABLED,
+    "firstUsable": JS_FIRST_USABLE,
+    "answerGeneric": JS_ANSWER_GENERIC,
+    "fillAllUsable": JS_FILL_ALL_USABLE,
+    "answerByType": JS_ANSWER_BY_TYPE,
+    "currentQuestionId": JS_CURRENT_QUESTION_ID,
+    "resolveInterruption": JS_RESOLVE_INTERRUPTION
+}
+# Returned by _ka_call's wrapper when the document has no window.__ka yet
+KA_MISSING = "__ka_missing__"
+KA_HELPER_JS = "window.__ka = {" + ", ".join(
+    f"{name}: function () {{{body}}}" for name, body in KA_HELPERS.items()
+) + "};" + JS_TRACK_INFLIGHT
+
+# Subresources aborted inside Chrome so they never reach mitmproxy.
+# Question data only ever arrives via GraphQL XHRs, so none of these are needed.
+# Stylesheets are deliberately allowed: visibility checks depend on computed layout.
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*/fonts/*",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    # Embedded hint/lesson videos and their thumbnails
+    "*youtube.com/embed*", "*youtube-nocookie.com/embed*", "*ytimg.com*",
+    # Analytics and ad trackers
+    "*googletagmanager*", "*google-analytics*", "*doubleclick*",
+    "*googlesyndication*", "*facebook.net*", "*hotjar*", "*sentry.io*",
+]
+
 class KhanAcademyBrowserAutomation:
-    def __init__(self, proxy_port=8080):
+    def __init__(self, proxy_port=8080, interruption_signal_port=None, user_data_dir=None, pool=None):
         self.proxy_port = proxy_port
+        self.interruption_signal_port = interruption_signal_port  # Port khan_signals.py reports to
+        self.user_data_dir = user_data_dir  # Separate profile so concurrent browsers don't share state
+        self.pool = pool  # BrowserPool to borrow a warm driver from instead of launching one
+        self.interruption_listener = None
         self.driver = None
-        self.wait = None
+        self.wait_page = None
         self.current_exercise_url = None
-        self.questions_loaded = set()
+        self._capture_session = None  # Exact key sent with the START sentinel, until STOP is sent
+        self._current_question_el = None  # Cached question container, cleared when the question changes
+        self._question_deadline = None  # time.monotonic() by which the current question must progress
+        # Bloom filter keeps memory flat on long runs; a rare false positive only skips a duplicate check
+        self.questions_loaded = ScalableBloomFilter(initial_capacity=10000, error_rate=0.001)
+        # Keys match INTERRUPTION_RULES and the signals from khan_signals.py
+        self._interruption_handlers = {
+            "practice complete": self.handle_completion_dialog,
+            "congratulations": self.handle_completion_dialog,
+            "streak": self.handle_streak_popup,
+            "hint": self.handle_hint_dialog,
+            "error": self.handle_error_dialog,
+            "try again": self.handle_retry_dialog
+        }
         
     def setup_browser(self):
         """Setup Chrome browser with proxy configuration - ENHANCED VERSION with better timeouts."""
+        try:
+            # A pooled driver comes already configured and possibly already warm
+            self.driver = self.pool.acquire() if self.pool is not None else self._create_driver()
+            
+            self.wait_page = WebDriverWait(self.driver, 20, poll_frequency=0.1)
+            self._start_interruption_listener()
+            logger.info("Browser setup complete with enhanced configuration")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to setup browser: {e}")
+            return False
+
+    def _create_driver(self):
+        """Launch Chrome and apply the per-browser CDP setup and timeouts."""
+        chrome_options = self._build_chrome_options()
+        driver = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+        # Install before any page script runs, on every navigation and frame
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+        })
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': KA_HELPER_JS})
+        self._block_non_question_requests(driver)
+        
+        # ENHANCED: More generous timeouts for slow connections
+        driver.set_page_load_timeout(60)  # Increased to 60 seconds
+        driver.implicitly_wait(0)  # Probes return immediately; use explicit waits
+        driver.set_script_timeout(60)  # Async waits carry their own, shorter deadlines
+        return driver
+
+    def ensure_browser(self):
+        """Reuse the running browser if it still responds, otherwise start a new one."""
+        if self.driver:
+            try:
+                self.driver.current_url  # Cheap liveness probe
+                return True
+            except WebDriverException:
+                logger.warning("Browser no longer responding, starting a new one")
+                self.cleanup()
+                self.driver = None
+        return self.setup_browser()
+
+    def _start_interruption_listener(self):
+        """Listen for interruption signals from the khan_signals mitmproxy addon, if configured.
+        
+        The addon reports to a single port, so only one automation can listen at a time;
+        any other (including every BrowserPool worker) falls back to page scans.
+        """
+        if not self.interruption_signal_port:
+            return
+        try:
+            self.interruption_listener = InterruptionListener(port=self.interruption_signal_port).start()
+            logger.info(f"Listening for interruption signals on port {self.interruption_signal_port}")
+        except OSError as e:
+            logger.warning(f"Could not listen for interruption signals, falling back to page scans: {e}")
+            self.interruption_listener = None
+
+    def _build_chrome_options(self):
+        """Build launch options for a Chrome instance owned by this automation."""
         chrome_options = Options()
         
         # Configure proxy
         chrome_options.add_argument(f'--proxy-server=http://127.0.0.1:{self.proxy_port}')
         
         # ESSENTIAL: SSL/Certificate handling for mitmproxy
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        chrome_options.add_argument('--ignore-certificate-errors-spki-list')
-        chrome_options.add_argument('--ignore-urlfetcher-cert-requests')
-        chrome_options.add_argument('--allow-running-insecure-content')
-        chrome_options.add_argument('--disable-web-security')
-        chrome_options.add_argument('--allow-insecure-localhost')
+        for arg in certificate_arguments():
+            chrome_options.add_argument(arg)
+        # Let sentinel requests through from HTTPS pages without mixed-content blocking
+        chrome_options.add_argument(f'--unsafely-treat-insecure-origin-as-secure=http://{START_CAPTURE_HOST},http://{STOP_CAPTURE_HOST}')
         
         # PERFORMANCE: Improve loading speed
         chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--disable-plugins')
-        chrome_options.add_argument('--disable-images')  # Speed up loading
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')  # Reduce resource usage
         chrome_options.add_argument('--disable-background-networking')
         chrome_options.add_argument('--disable-sync')
-        chrome_options.add_argument('--disable-translate')
+        # One flag: Chrome only honours the last --disable-features
+        chrome_options.add_argument('--disable-features=Translate,PaintHolding')
+        # Don't decode images; URL blocking stops most fetches, this covers inline/data images too
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        if HEADLESS:
+            chrome_options.add_argument('--headless=new')
         
         # AUTOMATION: Better detection avoidance
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
@@ -65,21 +681,97 @@ class KhanAcademyBrowserAutomation:
         # WINDOW: Start with reasonable size
         chrome_options.add_argument('--window-size=1280,720')  # Smaller for better performance
         
+        if self.user_data_dir:
+            chrome_options.add_argument(f'--user-data-dir={self.user_data_dir}')
+        
+        # POOLING: Keep windows that concurrent pool workers cover running at full speed
+        chrome_options.add_argument('--disable-background-timer-throttling')
+        chrome_options.add_argument('--disable-backgrounding-occluded-windows')
+        chrome_options.add_argument('--disable-renderer-backgrounding')
+        
+        return chrome_options
+    
+    def _block_non_question_requests(self, driver):
+        """Abort image/font/media/analytics requests in Chrome before they are routed through the proxy."""
         try:
-            self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            # ENHANCED: More generous timeouts for slow connections
-            self.driver.set_page_load_timeout(60)  # Increased to 60 seconds
-            self.driver.implicitly_wait(15)  # Increased implicit wait
-            
-            self.wait = WebDriverWait(self.driver, 30)  # Increased explicit wait
-            logger.info("Browser setup complete with enhanced configuration")
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_RESOURCE_PATTERNS})
+            # Keep the HTTP cache on so repeat navigations reuse scripts and styles
+            driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': False})
+            logger.info(f"Blocking {len(BLOCKED_RESOURCE_PATTERNS)} non-question resource patterns")
+        except Exception as e:
+            logger.warning(f"Could not enable request blocking: {e}")
+
+    def _ka_call(self, name, *args):
+        """Call a window.__ka page helper, installing the helpers first if this document lacks them.
+        
+        Errors thrown by the helper itself propagate; it is never re-run after a partial effect.
+        """
+        script = f"return window.__ka ? window.__ka.{name}(...arguments) : '{KA_MISSING}';"
+        result = self.driver.execute_script(script, *args)
+        if result != KA_MISSING:
+            return result
+        # Documents loaded before setup (or about:blank) never ran the new-document script
+        self.driver.execute_script(KA_HELPER_JS)
+        return self.driver.execute_script(script, *args)
+
+    def wait_for_dom_settle(self, quiet_ms=250, timeout=3):
+        """Block until the page DOM has gone quiet_ms without mutations, or timeout seconds pass."""
+        try:
+            self.driver.execute_async_script("""
+                const done = arguments[arguments.length - 1];
+                const quietMs = arguments[0];
+                const root = document.body || document.documentElement;
+                let timer = null;
+                const finish = () => { observer.disconnect(); clearTimeout(timer); clearTimeout(deadline); done(true); };
+                const observer = new MutationObserver(() => {
+                    clearTimeout(timer);
+                    timer = setTimeout(finish, quietMs);
+                });
+                observer.observe(root, {subtree: true, childList: true});
+                timer = setTimeout(finish, quietMs);
+                const deadline = setTimeout(finish, arguments[1]);
+            """, quiet_ms, int(self._budget(timeout) * 1000))
             return True
         except Exception as e:
-            logger.error(f"Failed to setup browser: {e}")
+            logger.debug("DOM settle wait failed: %s", e)
             return False
-    
+
+    def wait_for_network_idle(self, quiet_ms=500, timeout=10):
+        """Block until no request has been in flight or completed for quiet_ms, or timeout seconds pass."""
+        try:
+            timeout = self._budget(timeout)
+            return bool(self.driver.execute_async_script(JS_WAIT_FOR_NETWORK_IDLE, quiet_ms, int(timeout * 1000)))
+        except Exception as e:
+            logger.debug("Network idle wait failed: %s", e)
+            return False
+
+    def _signal_capture(self, host, exercise_url):
+        """Send a start/stop sentinel request that the mitmproxy addon uses to gate capture.
+
+        Blocks until the proxy has answered, so the caller's next navigation cannot drop it.
+        """
+        try:
+            if not self.driver.execute_async_script(
+                JS_SIGNAL_CAPTURE, host, exercise_url or "", int(CAPTURE_SIGNAL_TIMEOUT * 1000)
+            ):
+                logger.warning(f"Capture signal to {host} was not acknowledged")
+        except Exception as e:
+            logger.debug("Capture signal to %s failed: %s", host, e)
+
+    def _start_capture(self, session):
+        """Open a capture session keyed by session, closing any other one still open."""
+        if self._capture_session not in (None, session):
+            self._stop_capture()
+        self._signal_capture(START_CAPTURE_HOST, session)
+        self._capture_session = session
+
+    def _stop_capture(self):
+        """Close the open capture session with the same key it was started with, once."""
+        session, self._capture_session = self._capture_session, None
+        if session is not None:
+            self._signal_capture(STOP_CAPTURE_HOST, session)
+
     def navigate_to_exercise(self, exercise_url):
         """Navigate to a Khan Academy exercise with enhanced error handling."""
         try:
@@ -95,12 +787,10 @@ class KhanAcademyBrowserAutomation:
             for attempt in range(max_retries):
                 try:
                     logger.info(f"Navigation attempt {attempt + 1}/{max_retries}")
-                    self.driver.get(exercise_url)
+                    self._start_capture(exercise_url)
+                    self._navigate(exercise_url)
                     logger.info("Page load initiated successfully")
                     
-                    # Wait for basic page structure with timeout
-                    time.sleep(5)  # Initial wait
-                    
                     self.current_exercise_url = exercise_url
                     
                     # Check if page loaded successfully
@@ -110,15 +800,22 @@ class KhanAcademyBrowserAutomation:
                     else:
                         logger.warning(f"Page verification failed on attempt {attempt + 1}")
                         if attempt < max_retries - 1:
-                            time.sleep(5)  # Wait before retry
+                            time.sleep(backoff_delay(attempt))  # Wait before retry
                             continue
                         else:
                             return False
                             
+                except InvalidArgumentException as e:
+                    logger.error(f"URL rejected by the browser, not retrying: {e}")
+                    return False
                 except Exception as e:
                     logger.warning(f"Navigation attempt {attempt + 1} failed: {e}")
+                    # A network error with the proxy gone will not fix itself on retry
+                    if "net::ERR_" in str(e) and not self._proxy_alive():
+                        logger.error(f"Proxy on port {self.proxy_port} is not accepting connections")
+                        return False
                     if attempt < max_retries - 1:
-                        time.sleep(5)
+                        time.sleep(backoff_delay(attempt))
                         continue
                     else:
                         raise e
@@ -129,26 +826,42 @@ class KhanAcademyBrowserAutomation:
             logger.error(f"Navigation completely failed: {e}")
             return False
 
-    def _validate_url_accessibility(self, url):
-        """Validate that the URL is accessible before attempting navigation."""
+    def _proxy_alive(self):
+        """Return True if mitmproxy is accepting connections on proxy_port."""
         try:
-            # Basic URL structure validation
-            if not url.startswith("https://www.khanacademy.org/"):
-                logger.error("URL is not a Khan Academy URL")
-                return False
-            
-            # Check for placeholder URLs
-            if "..." in url or len(url) < 80:
-                logger.error("URL appears to be a placeholder or incomplete")
-                return False
-            
-            logger.info("URL validation passed")
+            socket.create_connection(("127.0.0.1", self.proxy_port), timeout=0.5).close()
             return True
-            
-        except Exception as e:
-            logger.error(f"URL validation error: {e}")
+        except OSError:
             return False
 
+    def _navigate(self, url, timeout=60):
+        """Navigate via CDP and return as soon as the document is interactive, not fully loaded."""
+        result = self.driver.execute_cdp_cmd('Page.navigate', {'url': url})
+        if result.get('errorText'):
+            raise WebDriverException(f"Navigation failed: {result['errorText']}")
+        
+        def document_interactive():
+            try:
+                return self.driver.execute_script("return document.readyState;") != 'loading'
+            except WebDriverException:
+                return False  # Old document unloading mid-navigation
+        
+        if not self._poll_until(document_interactive, timeout):
+            self.driver.execute_cdp_cmd('Page.stopLoading', {})
+            raise TimeoutException(f"Timed out loading {url}")
+
+    @staticmethod
+    def _validate_url_accessibility(url):
+        """Validate that the URL is accessible before attempting navigation."""
+        if EXERCISE_URL_RE.fullmatch(url):
+            logger.info("URL validation passed")
+            return True
+        if not url.startswith(KA_URL_PREFIX):
+            logger.error("URL is not a Khan Academy URL")
+        else:
+            logger.error("URL appears to be a placeholder or incomplete")
+        return False
+
     def _verify_page_loaded(self):
         """Verify that the page loaded successfully."""
         try:
@@ -161,19 +874,25 @@ class KhanAcademyBrowserAutomation:
                 logger.error("Not on Khan Academy domain")
                 return False
             
-            # Check if page has basic content
-            page_source = self.driver.page_source
-            if len(page_source) < 1000:  # Very basic check
+            # Check basic structure without serializing the whole DOM
+            ready, status, child_count, heading = self.driver.execute_script("""
+                const h1 = document.querySelector('h1');
+                const nav = performance.getEntriesByType('navigation')[0];
+                return [document.readyState, nav && nav.responseStatus ? nav.responseStatus : 0,
+                        document.body ? document.body.childElementCount : 0,
+                        h1 ? h1.innerText : ''];
+            """)
+            if ready not in ("interactive", "complete") or child_count == 0:
                 logger.error("Page content appears minimal")
                 return False
             
-            # Check for common error indicators
-            error_indicators = ["404", "not found", "error", "blocked"]
-            page_text = page_source.lower()
-            for indicator in error_indicators:
-                if indicator in page_text and "error" in page_text[:2000]:  # Check early in page
-                    logger.error(f"Page contains error indicator: {indicator}")
-                    return False
+            # Error pages announce themselves by HTTP status or an error-only main heading
+            if status >= 400:
+                logger.error(f"Page returned HTTP {status}")
+                return False
+            if heading.strip().lower() in PAGE_ERROR_HEADINGS:
+                logger.error(f"Page shows error heading: {heading.strip()}")
+                return False
             
             logger.info("Page verification passed")
             return True
@@ -185,13 +904,7 @@ class KhanAcademyBrowserAutomation:
     def _check_partial_page_load(self):
         """Check if a partial page load has enough content to be useful."""
         try:
-            # Step 1: Check for basic page structure
-            body = self.driver.find_element(By.TAG_NAME, "body")
-            if not body:
-                logger.info("No body element found")
-                return False
-            
-            # Step 2: Check current URL contains khanacademy
+            # Step 1: Check current URL contains khanacademy
             current_url = self.driver.current_url.lower()
             if "khanacademy" not in current_url:
                 logger.info(f"Not on Khan Academy: {current_url}")
@@ -199,20 +912,18 @@ class KhanAcademyBrowserAutomation:
             
             logger.info(f"On Khan Academy URL: {current_url}")
             
-            # Step 3: Check for ANY content - be very lenient
+            # Step 2: Check for ANY content - be very lenient
             try:
-                # Look for any div, span, or content elements
-                content_elements = self.driver.find_elements(By.CSS_SELECTOR, 
-                    "div, span, p, h1, h2, h3, article, section, main")
+                # Counts only cross the wire, not a reference per element
+                (element_count,), text_length = self._probe([PAGE_STRUCTURE_SELECTOR])
                 
-                if len(content_elements) > 5:  # Very low bar - just need some elements
-                    logger.info(f"Found {len(content_elements)} content elements")
+                if element_count > 5:  # Very low bar - just need some elements
+                    logger.info(f"Found {element_count} content elements")
                     return True
                     
                 # Also check for any text content
-                page_text = self.driver.execute_script("return document.body.innerText || '';")
-                if len(page_text.strip()) > 20:  # Any reasonable amount of text
-                    logger.info(f"Found {len(page_text)} characters of text content")
+                if text_length > 20:  # Any reasonable amount of text
+                    logger.info(f"Found {text_length} characters of text content")
                     return True
                     
                 logger.info("Insufficient content found")
@@ -232,26 +943,10 @@ class KhanAcademyBrowserAutomation:
         try:
             logger.info("Waiting for Khan Academy page to be ready...")
             
-            # Step 1: Wait for basic DOM
+            # Step 1: Wait for Khan Academy specific content
             try:
-                basic_wait = WebDriverWait(self.driver, 15)
-                basic_wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                logger.info("Basic DOM structure loaded")
-            except TimeoutException:
-                logger.warning("Basic DOM timeout")
-                return False
-            
-            # Step 2: Wait for Khan Academy specific content
-            try:
-                ka_wait = WebDriverWait(self.driver, 20)
                 # Look for Khan Academy app or exercise content
-                ka_wait.until(EC.any_of(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#application")),
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-test-id]")),
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".exercise")),
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".problem")),
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[class*='khan']"))
-                ))
+                self.wait_page.until(KA_CONTENT_EC)
                 logger.info("Khan Academy content detected")
             except TimeoutException:
                 logger.warning("Khan Academy content timeout, checking URL...")
@@ -261,11 +956,13 @@ class KhanAcademyBrowserAutomation:
                 else:
                     return False
             
-            # Step 3: Wait a bit more for JavaScript to initialize
+            # Step 2: Wait for JavaScript to initialize: its bundle and data requests go quiet
             logger.info("Waiting for JavaScript initialization...")
-            time.sleep(10)  # Give time for Khan Academy's JS to load
+            if not self.wait_for_network_idle():
+                logger.debug("Network never went idle, waiting for the DOM to settle instead")
+                self.wait_for_dom_settle(quiet_ms=600, timeout=5)
             
-            # Step 4: Check if we have actual content
+            # Step 3: Check if we have actual content
             if self._check_khan_academy_content():
                 logger.info("Khan Academy page is ready with content")
                 return True
@@ -285,38 +982,19 @@ class KhanAcademyBrowserAutomation:
             if "khanacademy" not in current_url:
                 return False
             
-            # Check for content elements
-            content_selectors = [
-                "#application",
-                "[data-test-id]", 
-                ".exercise",
-                ".problem",
-                ".question",
-                "[class*='khan']",
-                "div[role='main']",
-                "main"
-            ]
+            # Count every content selector and measure the text in one round-trip
+            counts, text_length = self._probe(KA_CONTENT_SELECTORS)
             
             content_found = 0
-            for selector in content_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        content_found += len(elements)
-                        logger.info(f"Found {len(elements)} elements for selector: {selector}")
-                except:
-                    continue
+            for selector, count in zip(KA_CONTENT_SELECTORS, counts):
+                if count:
+                    content_found += count
+                    logger.info(f"Found {count} elements for selector: {selector}")
             
             # Check for text content
-            try:
-                page_text = self.driver.execute_script("return document.body.innerText || '';")
-                text_length = len(page_text.strip())
-                logger.info(f"Page contains {text_length} characters of text")
-                
-                if text_length > 100:  # Reasonable amount of text
-                    content_found += 1
-            except:
-                pass
+            logger.info(f"Page contains {text_length} characters of text")
+            if text_length > 100:  # Reasonable amount of text
+                content_found += 1
             
             logger.info(f"Total content indicators found: {content_found}")
             return content_found > 0
@@ -331,173 +1009,124 @@ class KhanAcademyBrowserAutomation:
     def start_exercise(self):
         """Start the exercise to trigger question loading."""
         try:
-            # Look for various start buttons
-            start_selectors = [
-                "button[data-test-id='start-button']",
-                "button[data-test-id='practice-button']",
-                "a[data-test-id='start-practice']",
-                ".btn:contains('Start')",
-                ".btn:contains('Practice')",
-                "button:contains('Start')",
-                "button:contains('Practice')"
-            ]
-            
-            for selector in start_selectors:
-                try:
-                    if ":contains" in selector:
-                        # Handle jQuery-style selectors with JavaScript
-                        element = self.driver.execute_script(f"""
-                            return Array.from(document.querySelectorAll('button')).find(el => 
-                                el.textContent.includes('{selector.split("'")[1]}'));
-                        """)
-                        if element:
-                            self.driver.execute_script("arguments[0].click();", element)
-                            logger.info(f"Clicked start button using JavaScript: {selector}")
-                            break
-                    else:
-                        element = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                        element.click()
-                        logger.info(f"Clicked start button: {selector}")
-                        break
-                except TimeoutException:
-                    continue
-                except Exception as e:
-                    logger.debug(f"Selector {selector} failed: {e}")
-                    continue
-            
-            # Wait for exercise to load
-            time.sleep(5)
+            # All selectors are probed together in the browser and re-probed on DOM changes
+            clicked = self.driver.execute_async_script(
+                JS_CLICK_START_BUTTON, START_BUTTON_SELECTORS, START_BUTTON_TEXTS,
+                int(self._budget(START_BUTTON_TIMEOUT) * 1000)
+            )
+            if clicked:
+                logger.info(f"Clicked start button: {clicked}")
+            else:
+                logger.debug("No start button appeared")
+            
+            # Wait for the first question to render rather than for the page to go quiet
+            if not self.driver.execute_async_script(
+                JS_WAIT_FOR_SELECTOR, f"{QUESTION_RENDERER_SELECTOR}, {QUESTION_READY_SELECTOR}",
+                int(self._budget(FIRST_QUESTION_TIMEOUT) * 1000)
+            ):
+                logger.debug("No question rendered after starting the exercise")
             return True
             
         except Exception as e:
             logger.error(f"Failed to start exercise: {e}")
             return False
     
-    def refresh_page(self):
-        """Refresh the current page to get fresh questions."""
-        try:
-            logger.info("Refreshing page to load new questions...")
-            self.driver.refresh()
-            time.sleep(3)
-            
-            # Restart the exercise after refresh
-            self.start_exercise()
-            return True
-        except Exception as e:
-            logger.error(f"Failed to refresh page: {e}")
-            return False
-    
     def simulate_question_interaction(self):
         """Simulate interaction to trigger question loading and progression."""
         try:
-            # Method 1: Try to find and click next question button
-            next_selectors = [
-                "button[data-test-id='next-question']",
-                "button:contains('Next')",
-                ".next-button",
-                "button[aria-label*='Next']",
-                "button[title*='Next']"
-            ]
-            
-            for selector in next_selectors:
-                try:
-                    if ":contains" in selector:
-                        element = self.driver.execute_script(f"""
-                            return Array.from(document.querySelectorAll('button')).find(el => 
-                                el.textContent.toLowerCase().includes('next'));
-                        """)
-                        if element:
-                            self.driver.execute_script("arguments[0].click();", element)
-                            logger.info("Clicked next question button")
-                            time.sleep(2)
-                            return True
-                    else:
-                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if element.is_enabled():
-                            element.click()
-                            logger.info(f"Clicked next question: {selector}")
-                            time.sleep(2)
-                            return True
-                except Exception:
-                    continue
+            # Method 1: Try to find and click next question button, selectors then text,
+            # with the installed page helper in one call
+            if self._click_first(NEXT_QUESTION_SELECTORS, ["next"], scope='button'):
+                logger.debug("Clicked next question")
+                self.wait_for_dom_settle()
+                return True
             
             # Method 2: Try to answer current question to progress
             self.attempt_to_answer_question()
             
-            # Method 3: Look for question elements to interact with
-            interactive_selectors = [
-                "input[type='text']",
-                "input[type='number']", 
-                ".radio input",
-                ".multiple-choice input",
-                "button[data-test-id='check-answer']",
-                ".btn-primary"
-            ]
-            
-            for selector in interactive_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        # Just focus on the element to trigger any lazy loading
-                        self.driver.execute_script("arguments[0].focus();", elements[0])
-                        time.sleep(0.5)
-                        break
-                except Exception:
-                    continue
+            # Method 3: Just focus on the first question element found to trigger any lazy loading
+            focused = self.driver.execute_script("""
+                const el = document.querySelector(arguments[0]);
+                if (el) el.focus();
+                return !!el;
+            """, INTERACTIVE_SELECTOR)
+            if focused:
+                self.wait_for_dom_settle()
                     
             return True
         except Exception as e:
             logger.error(f"Failed to simulate interaction: {e}")
             return False
 
-    def detect_question_type(self):
+    def _dom_snapshot(self, selectors):
+        """Query every selector in one round-trip and return {selector: [elements]}.
+        
+        Lookups are scoped to the cached question container, which is refreshed in the
+        same call when missing or detached. A snapshot is only valid until the next
+        click or keystroke changes the page.
+        """
+        script = """
+            const [selectors, cached, rootSelector] = arguments;
+            const root = cached && cached.isConnected ? cached : document.querySelector(rootSelector);
+            const scope = root || document;
+            const snapshot = {};
+            for (const sel of selectors) snapshot[sel] = Array.from(scope.querySelectorAll(sel));
+            return {root, snapshot};
+        """
+        try:
+            result = self.driver.execute_script(script, list(selectors), self._current_question_el, QUESTION_RENDERER_SELECTOR)
+        except StaleElementReferenceException:
+            result = self.driver.execute_script(script, list(selectors), None, QUESTION_RENDERER_SELECTOR)
+        self._current_question_el = result["root"]
+        return result["snapshot"]
+
+    def _probe(self, selectors):
+        """Return ([match count per selector], page text length) from one round-trip."""
+        counts, text_length = self.driver.execute_script(JS_PROBE, list(selectors))
+        return counts, text_length
+
+    def detect_question_type(self, snapshot=None):
         """Detect the type of question being displayed."""
         try:
-            selectors = {
-                "numeric_input": "input[type='text'], input[data-test-id='numeric-input'], input[type='number']",
-                "multiple_choice": "input[type='radio'], .multiple-choice",
-                "expression": "input[data-test-id='expression-input']",
-                "graph": ".graphie, .interactive-graph",
-                "dropdown": "select, .dropdown"
-            }
-            
-            for question_type, selector in selectors.items():
-                if self.driver.find_elements(By.CSS_SELECTOR, selector):
-                    logger.info(f"Detected question type: {question_type}")
-                    return question_type
+            if snapshot is not None:
+                question_type = next(
+                    (qtype for qtype, selector in QUESTION_TYPE_SELECTORS.items() if snapshot.get(selector)),
+                    None
+                )
+            else:
+                # Classify with a single round-trip; dict order sets priority
+                counts, _ = self._probe(QUESTION_TYPE_SELECTORS.values())
+                question_type = next(
+                    (qtype for qtype, count in zip(QUESTION_TYPE_SELECTORS, counts) if count),
+                    None
+                )
+            if question_type:
+                logger.debug("Detected question type: %s", question_type)
+                return question_type
             return "generic"
         except Exception as e:
-            logger.debug(f"Error detecting question type: {e}")
+            logger.debug("Error detecting question type: %s", e)
             return "generic"
     
     def auto_answer_question(self):
         """Automatically answer the current question based on its type."""
         try:
             # Wait a moment for page to settle
-            time.sleep(2)
+            self.wait_for_dom_settle()
             
-            # Check if there's any content to work with
+            # Query everything this question's pipeline needs in one round-trip
             try:
-                # Look for any exercise/question content with more lenient selectors
-                content_selectors = [
-                    "[data-test-id='exercise-content']",
-                    ".problem-content", 
-                    ".question-content",
-                    ".exercise-content",
-                    ".problem",
-                    ".question",
-                    "[class*='question']",
-                    "[class*='problem']",
-                    "[class*='exercise']"
-                ]
+                snapshot = self._dom_snapshot([
+                    QUESTION_CONTENT_SELECTOR,
+                    *QUESTION_TYPE_SELECTORS.values(),
+                    NUMERIC_INPUT_SELECTOR,
+                    RADIO_INPUT_SELECTOR,
+                    EXPRESSION_INPUT_SELECTOR,
+                    TEXT_INPUT_SELECTOR
+                ])
                 
-                content_found = False
-                for selector in content_selectors:
-                    if self.driver.find_elements(By.CSS_SELECTOR, selector):
-                        content_found = True
-                        break
-                
-                if not content_found:
+                # A found question container is itself proof of content
+                if self._current_question_el is None and not snapshot.get(QUESTION_CONTENT_SELECTOR):
                     logger.warning("No question content found - page may not be ready")
                     return False
                     
@@ -506,92 +1135,88 @@ class KhanAcademyBrowserAutomation:
                 return False
             
             # Detect question type and answer appropriately
-            question_type = self.detect_question_type()
+            question_type = self.detect_question_type(snapshot)
             
             if question_type == "numeric_input":
-                return self.answer_numeric_question()
+                return self.answer_numeric_question(snapshot)
             elif question_type == "multiple_choice":
-                return self.answer_multiple_choice()
+                return self.answer_multiple_choice(snapshot)
             elif question_type == "expression":
-                return self.answer_expression_question()
+                return self.answer_expression_question(snapshot)
             else:
-                return self.answer_generic_question()
+                return self.answer_generic_question(snapshot)
                 
         except Exception as e:
             logger.error(f"Failed to auto-answer question: {e}")
             return False
     
-    def answer_numeric_question(self):
+    def first_usable(self, selector, fill_value=None, click=False, snapshot=None):
+        """Fill or click the first visible, enabled match for selector in one round-trip.
+        
+        Visibility and enabled checks run in the browser rather than as per-element calls.
+        """
+        candidates = snapshot[selector] if snapshot is not None and selector in snapshot else selector
+        return bool(self._ka_call('firstUsable', candidates, fill_value, click))
+
+    def answer_numeric_question(self, snapshot=None):
         """Answer numeric input questions."""
         try:
-            numeric_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='text'], input[type='number'], input[data-test-id='numeric-input']")
-            for input_elem in numeric_inputs:
-                if input_elem.is_displayed() and input_elem.is_enabled():
-                    input_elem.clear()
-                    # Use a simple answer that's likely to be wrong but will trigger progression
-                    input_elem.send_keys("1")
-                    logger.info("Filled numeric input with test value")
-                    time.sleep(0.5)
-                    return True
+            # Use a simple answer that's likely to be wrong but will trigger progression;
+            # every blank is filled in the same call so multi-input questions unlock too
+            candidates = snapshot[NUMERIC_INPUT_SELECTOR] if snapshot is not None and NUMERIC_INPUT_SELECTOR in snapshot else NUMERIC_INPUT_SELECTOR
+            if self._ka_call('fillAllUsable', candidates, ["1"]):
+                logger.debug("Filled numeric inputs with test value")
+                self._wait_for_answer_registered()
+                return True
             return False
         except Exception as e:
-            logger.debug(f"Error answering numeric question: {e}")
+            logger.debug("Error answering numeric question: %s", e)
             return False
     
-    def answer_multiple_choice(self):
+    def answer_multiple_choice(self, snapshot=None):
         """Answer multiple choice questions."""
         try:
-            radio_buttons = self.driver.find_elements(By.CSS_SELECTOR, "input[type='radio']")
-            if radio_buttons:
-                # Select the first option
-                first_radio = radio_buttons[0]
-                if first_radio.is_displayed() and first_radio.is_enabled():
-                    self.driver.execute_script("arguments[0].click();", first_radio)
-                    logger.info("Selected first multiple choice option")
-                    time.sleep(0.5)
-                    return True
+            # Select the first usable option
+            if self.first_usable(RADIO_INPUT_SELECTOR, click=True, snapshot=snapshot):
+                logger.debug("Selected first multiple choice option")
+                self._wait_for_answer_registered()
+                return True
             return False
         except Exception as e:
-            logger.debug(f"Error answering multiple choice: {e}")
+            logger.debug("Error answering multiple choice: %s", e)
             return False
     
-    def answer_expression_question(self):
+    def answer_expression_question(self, snapshot=None):
         """Answer expression input questions."""
         try:
-            expression_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[data-test-id='expression-input'], .math-input")
-            for input_elem in expression_inputs:
-                if input_elem.is_displayed() and input_elem.is_enabled():
-                    input_elem.clear()
-                    input_elem.send_keys("x")
-                    logger.info("Filled expression input with test value")
-                    time.sleep(0.5)
-                    return True
+            if self.first_usable(EXPRESSION_INPUT_SELECTOR, fill_value="x", snapshot=snapshot):
+                logger.debug("Filled expression input with test value")
+                self._wait_for_answer_registered()
+                return True
             return False
         except Exception as e:
-            logger.debug(f"Error answering expression question: {e}")
+            logger.debug("Error answering expression question: %s", e)
             return False
     
-    def answer_generic_question(self):
+    def answer_generic_question(self, snapshot=None):
         """Fallback method for unknown question types."""
         try:
-            # Try to fill any visible text inputs
-            text_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='text']")
-            for input_elem in text_inputs:
-                if input_elem.is_displayed() and input_elem.is_enabled():
-                    input_elem.clear()
-                    input_elem.send_keys("1")
-                    time.sleep(0.5)
-            
-            # Try to click first radio button if available
-            radio_buttons = self.driver.find_elements(By.CSS_SELECTOR, "input[type='radio']")
-            if radio_buttons:
-                self.driver.execute_script("arguments[0].click();", radio_buttons[0])
-                time.sleep(0.5)
-            
-            logger.info("Applied generic answer strategy")
+            # One filled input is enough to unlock the check button; otherwise click the
+            # first radio button. Both attempts run in one call.
+            snapshot = snapshot or {}
+            used = self._ka_call(
+                'answerGeneric',
+                snapshot.get(TEXT_INPUT_SELECTOR, TEXT_INPUT_SELECTOR),
+                snapshot.get(RADIO_INPUT_SELECTOR, RADIO_INPUT_SELECTOR),
+                "1"
+            )
+            if used:
+                self._wait_for_answer_registered()
+            
+            logger.debug("Applied generic answer strategy: %s", used)
             return True
         except Exception as e:
-            logger.debug(f"Error with generic answer strategy: {e}")
+            logger.debug("Error with generic answer strategy: %s", e)
             return False
     
     def attempt_to_answer_question(self):
@@ -599,38 +1224,103 @@ class KhanAcademyBrowserAutomation:
         Legacy method maintained for compatibility - now uses auto_answer_question.
         """
         return self.auto_answer_question()
+
+    def _budget(self, timeout):
+        """Cap a wait's timeout to what remains of the current question's time budget."""
+        if self._question_deadline is None:
+            return timeout
+        return max(0, min(timeout, self._question_deadline - time.monotonic()))
+
+    def _poll_until(self, predicate, timeout, initial_delay=0.05, max_delay=0.5):
+        """Poll predicate with exponential backoff, checking once before the first sleep."""
+        deadline = time.monotonic() + self._budget(timeout)
+        delay = initial_delay
+        while True:
+            if predicate():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 1.5, max_delay)
+
+    def _wait_for_answer_registered(self, timeout=ANSWER_REGISTER_TIMEOUT):
+        """Wait until the page enables a check button, i.e. it has taken the answer."""
+        return self._poll_until(
+            lambda: self._ka_call('findFirstEnabled', CHECK_ANSWER_SELECTORS, CHECK_ANSWER_TEXTS, 'button') is not None,
+            timeout
+        )
+
+    def _wait_for_retry_closed(self, timeout=RETRY_CLOSE_TIMEOUT):
+        """Wait until the try-again dialog is gone or an answer input is usable again."""
+        selector, texts = DIALOG_BUTTONS["try again"]
+        return self._poll_until(
+            lambda: (self._ka_call('findFirstEnabled', [selector], texts, 'button') is None
+                     or self._ka_call('findFirstEnabled', [GENERIC_INPUT_SELECTOR], [], 'input') is not None),
+            timeout
+        )
+
+    def _current_question_id(self):
+        """Return an identifier for the question currently rendered, or None."""
+        try:
+            return self._ka_call('currentQuestionId', QUESTION_CONTENT_SELECTOR)
+        except WebDriverException:
+            return None  # Page swapping documents mid-transition
+
+    def _arm_new_question(self):
+        """Reset the proxy's new-question signal before a click and return the current question id."""
+        if self.interruption_listener is not None:
+            self.interruption_listener.new_question.clear()
+        return self._current_question_id()
+
+    def _question_data_arrived(self):
+        """True if the proxy has signalled a question delivery since the last _arm_new_question."""
+        return self.interruption_listener is not None and self.interruption_listener.new_question.is_set()
+
+    def _record_question(self, qid):
+        """Remember a rendered question so repeats within this run can be spotted."""
+        if qid in self.questions_loaded:
+            logger.debug("Question repeated, nothing new to capture: %s", qid[:60])
+        else:
+            self.questions_loaded.add(qid)
+
+    def wait_for_question_change(self, old_qid, timeout=8):
+        """Wait until the rendered question differs from old_qid.
+        
+        Between checks, sleep on the proxy's new-question signal when it is available so
+        the check re-runs the moment the next question's data arrives; once it has
+        arrived, re-check quickly until the question renders.
+        """
+        signal = self.interruption_listener.new_question if self.interruption_listener is not None else None
+        deadline = time.monotonic() + self._budget(timeout)
+        while True:
+            qid = self._current_question_id()
+            if qid not in (old_qid, None):
+                self._current_question_el = None
+                self._record_question(qid)
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.debug("Question did not change before timeout")
+                return False
+            if signal is not None and signal.is_set():
+                time.sleep(min(0.05, remaining))  # Data is in; the render is imminent
+            elif signal is not None:
+                signal.wait(min(0.25, remaining))
+            else:
+                time.sleep(min(0.25, remaining))
+
     def wait_for_question_load(self, timeout=30):
         """Wait for a new question to fully load with multiple indicators."""
         try:
-            # Wait for exercise content
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "[data-test-id='exercise-content'], .problem-content, .question-content")))
-            
-            # Wait for question content to be visible
-            self.wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, ".question-content, .problem-content, .exercise-content")))
-            
-            # Wait for input elements to be interactable
-            input_selectors = [
-                "input[type='text']",
-                "input[type='radio']", 
-                "input[type='number']",
-                "button[data-test-id='check-answer']"
-            ]
+            # Resolved inside the page on the DOM change that renders the question, not by polling
+            if not self.driver.execute_async_script(JS_WAIT_FOR_SELECTOR, QUESTION_READY_SELECTOR, int(timeout * 1000)):
+                logger.warning("Question load timeout - continuing anyway")
+                return False
             
-            for selector in input_selectors:
-                try:
-                    WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    break
-                except TimeoutException:
-                    continue
-                    
-            # Additional wait for JavaScript to settle
-            time.sleep(2)
-            logger.info("Question loaded successfully")
+            logger.debug("Question loaded successfully")
             return True
             
-        except TimeoutException:
-            logger.warning("Question load timeout - continuing anyway")
-            return False
         except Exception as e:
             logger.error(f"Error waiting for question load: {e}")
             return False
@@ -638,20 +1328,20 @@ class KhanAcademyBrowserAutomation:
     def progress_to_next_question(self):
         """Progress to next question using UI buttons instead of refresh - ENHANCED VERSION."""
         try:
-            logger.info("Starting intelligent question progression sequence")
+            logger.debug("Starting intelligent question progression sequence")
             
             # Step 1: Wait for page stability and detect question type
             if not self._wait_for_stable_page():
                 logger.warning("Page not stable, but continuing...")
             
-            question_type = self.detect_question_type()
-            logger.info(f"Detected question type: {question_type}")
-            
-            # Step 2: Answer the question intelligently based on Perseus format
+            # Step 2: Detect the type and answer it based on Perseus format, in one call
             try:
-                success = self._answer_question_by_type(question_type)
+                question_type, success = self._ka_call(
+                    'answerByType', list(QUESTION_TYPE_SELECTORS.items()), ANSWER_PLANS
+                )
+                logger.debug("Detected question type: %s", question_type)
                 if success:
-                    logger.info("Question answered successfully")
+                    logger.debug("Question answered successfully")
                 else:
                     logger.warning("Could not answer question, will still try to progress")
             except Exception as e:
@@ -667,7 +1357,7 @@ class KhanAcademyBrowserAutomation:
                 logger.error("Failed to progress to next question")
                 return False
                 
-            logger.info("Question progression completed successfully")
+            logger.debug("Question progression completed successfully")
             return True
             
         except Exception as e:
@@ -677,38 +1367,18 @@ class KhanAcademyBrowserAutomation:
     def _wait_for_stable_page(self):
         """Wait for Khan Academy page to stabilize after navigation."""
         try:
-            # Wait for loading indicators to disappear
-            loading_selectors = [
-                ".loading-spinner", "[data-test-id*='loading']", 
-                ".skeleton-loader", "[aria-label*='loading']",
-                ".spinner", ".loader"
-            ]
-            
-            for selector in loading_selectors:
-                try:
-                    WebDriverWait(self.driver, 3).until_not(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                except TimeoutException:
-                    pass
-            
-            # Wait for interactive content to be available
-            interactive_selectors = [
-                "input[type='text']", "input[type='number']", 
-                "input[type='radio']", "button[data-test-id*='check']",
-                "[data-test-id*='numeric-input']"
-            ]
-            
-            for selector in interactive_selectors:
-                try:
-                    WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    logger.info(f"Interactive content ready: {selector}")
-                    time.sleep(1)  # Brief pause for JS to initialize
-                    return True
-                except TimeoutException:
-                    continue
+            # Resolved in the page on the mutation that removes the last loading
+            # indicator or mounts the inputs, rather than on a 0.5 s poll
+            if self.driver.execute_async_script(
+                JS_WAIT_FOR_INTERACTIVE, INTERACTIVE_CONTENT_SELECTOR, LOADING_INDICATOR_SELECTOR,
+                int(self._budget(5) * 1000)
+            ):
+                logger.debug("Interactive content ready")
+                # Once the proxy has seen the question data, the inputs mount in the same
+                # render that follows it; only settle when that signal isn't available
+                if not self._question_data_arrived():
+                    self.wait_for_dom_settle()  # Let the question widgets finish mounting
+                return True
             
             logger.warning("No interactive content detected, but proceeding")
             return True
@@ -717,108 +1387,14 @@ class KhanAcademyBrowserAutomation:
             logger.error(f"Error waiting for stable page: {e}")
             return False
 
-    def _answer_question_by_type(self, question_type):
-        """Answer question based on detected type and Perseus format."""
-        try:
-            if question_type == "numeric_input":
-                return self._answer_numeric_inputs()
-            elif question_type == "multiple_choice":
-                return self._answer_multiple_choice_enhanced()
-            elif question_type == "expression":
-                return self._answer_expression_enhanced()
-            else:
-                return self._answer_generic_enhanced()
-        except Exception as e:
-            logger.error(f"Error answering question type {question_type}: {e}")
-            return False
-
-    def _answer_numeric_inputs(self):
-        """Handle numeric input questions (like the seals example)."""
-        try:
-            # Look for numeric input fields with Perseus-style data attributes
-            numeric_selectors = [
-                "[data-test-id*='numeric-input']",
-                "input[type='number']",
-                "input[type='text'][data-test-id*='input']",
-                ".perseus-widget-numeric-input input",
-                "input[aria-label*='answer']"
-            ]
-            
-            inputs_filled = 0
-            for selector in numeric_selectors:
-                try:
-                    inputs = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for input_elem in inputs:
-                        if input_elem.is_displayed() and input_elem.is_enabled():
-                            # Clear and fill with a reasonable test value
-                            input_elem.clear()
-                            time.sleep(0.3)
-                            
-                            # Use different values for different inputs
-                            test_values = ["5", "35", "7", "42", "10"]
-                            value = test_values[inputs_filled % len(test_values)]
-                            
-                            input_elem.send_keys(value)
-                            logger.info(f"Filled numeric input with: {value}")
-                            inputs_filled += 1
-                            time.sleep(0.5)
-                except Exception as e:
-                    logger.debug(f"Error with numeric input {selector}: {e}")
-                    continue
-            
-            return inputs_filled > 0
-            
-        except Exception as e:
-            logger.error(f"Error answering numeric inputs: {e}")
-            return False
-
     def _submit_answer_with_retry(self):
         """Submit answer with multiple retry strategies."""
         try:
-            # Enhanced check button detection
-            check_selectors = [
-                "button[data-test-id='check-answer-button']",
-                "button[data-test-id='check-answer']",
-                "button[data-test-id='check']",
-                ".perseus-widget-interaction button:contains('Check')",
-                "button.check-answer-button",
-                "button:contains('Check')",
-                "button:contains('Submit')",
-                "[data-test-id*='check'] button"
-            ]
-            
-            for attempt in range(3):  # 3 attempts
-                for selector in check_selectors:
-                    try:
-                        if ":contains" in selector:
-                            # Handle text-based selectors with JavaScript
-                            element = self.driver.execute_script("""
-                                return Array.from(document.querySelectorAll('button')).find(el => 
-                                    el.textContent.toLowerCase().includes('check') ||
-                                    el.textContent.toLowerCase().includes('submit'));
-                            """)
-                            if element and element.is_enabled():
-                                self.driver.execute_script("arguments[0].click();", element)
-                                logger.info("Submitted answer via JavaScript")
-                                time.sleep(2)  # Wait for submission processing
-                                return True
-                        else:
-                            check_button = WebDriverWait(self.driver, 2).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                            check_button.click()
-                            logger.info(f"Submitted answer: {selector}")
-                            time.sleep(2)
-                            return True
-                    except TimeoutException:
-                        continue
-                    except Exception as e:
-                        logger.debug(f"Submit attempt failed for {selector}: {e}")
-                        continue
-                
-                if attempt < 2:  # Don't sleep on last attempt
-                    logger.info(f"Submit attempt {attempt + 1} failed, retrying...")
-                    time.sleep(1)
+            # Every selector and text is re-checked on each poll, so one wait replaces the retry loops
+            if self._click_first_available(CHECK_ANSWER_SELECTORS, CHECK_ANSWER_TEXTS, timeout=5):
+                # No settle here: the next-button poll returns as soon as feedback renders
+                logger.debug("Submitted answer")
+                return True
             
             logger.warning("All submit attempts failed")
             return False
@@ -827,50 +1403,31 @@ class KhanAcademyBrowserAutomation:
             logger.error(f"Error submitting answer: {e}")
             return False
 
+    def _click_first_available(self, css_selectors, texts=(), scope='button', timeout=3):
+        """Wait until any selector or button text matches an enabled element, then click it.
+        
+        Each poll finds and clicks in the same call, so a hit costs no extra round-trip.
+        Polls back off from 50 ms, so a button that is nearly ready is clicked almost at once.
+        """
+        return self._poll_until(lambda: self._click_first(css_selectors, texts, scope), timeout)
+
     def _continue_to_next_question(self):
         """Continue to next question after answer submission."""
         try:
-            # Wait a moment for feedback to appear
-            time.sleep(2)
+            old_qid = self._arm_new_question()
             
-            # Look for next question / continue buttons
-            next_selectors = [
-                "button[data-test-id='next-question']",
-                "button[data-test-id='continue']",
-                "button:contains('Next')",
-                "button:contains('Continue')",
-                "button:contains('Next question')",
-                ".next-question-button",
-                "[data-test-id*='next'] button",
-                "[data-test-id*='continue'] button"
-            ]
+            # Poll for the next/continue button the feedback renders; if the submit
+            # didn't take, this times out and the caller recovers
+            if self._click_first_available([NEXT_BUTTON_SELECTOR], timeout=5):
+                logger.debug("Continued to next question")
+                self.wait_for_question_change(old_qid)
+                return True
             
-            for selector in next_selectors:
-                try:
-                    if ":contains" in selector:
-                        element = self.driver.execute_script("""
-                            return Array.from(document.querySelectorAll('button')).find(el => 
-                                el.textContent.toLowerCase().includes('next') ||
-                                el.textContent.toLowerCase().includes('continue'));
-                        """)
-                        if element and element.is_enabled():
-                            self.driver.execute_script("arguments[0].click();", element)
-                            logger.info("Continued to next question via JavaScript")
-                            time.sleep(3)  # Wait for next question to load
-                            return True
-                    else:
-                        next_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                        next_button.click()
-                        logger.info(f"Continued to next question: {selector}")
-                        time.sleep(3)
-                        return True
-                except TimeoutException:
-                    continue
-                except Exception as e:
-                    logger.debug(f"Next button {selector} failed: {e}")
-                    continue
+            # Fall back to matching button text in a single pass
+            if self._click_first([], PROGRESS_TEXTS):
+                logger.debug("Continued to next question via JavaScript")
+                self.wait_for_question_change(old_qid)
+                return True
             
             logger.warning("No next/continue button found")
             return False
@@ -879,166 +1436,141 @@ class KhanAcademyBrowserAutomation:
             logger.error(f"Error continuing to next question: {e}")
             return False
 
-    def _answer_multiple_choice_enhanced(self):
-        """Enhanced multiple choice answering."""
+    def refresh_page(self):
+        """Refresh the current page to get fresh questions.
+        
+        Tries a client-side route change first, which keeps the loaded app bundle,
+        and only falls back to a full reload when that yields no new question.
+        """
         try:
-            radio_selectors = [
-                "input[type='radio']",
-                ".multiple-choice input",
-                "[data-test-id*='choice'] input",
-                ".answer-choice input"
-            ]
+            if self._soft_route_reset():
+                return True
             
-            for selector in radio_selectors:
-                try:
-                    radio_buttons = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if radio_buttons:
-                        # Select the first visible and enabled option
-                        for radio in radio_buttons:
-                            if radio.is_displayed() and radio.is_enabled():
-                                self.driver.execute_script("arguments[0].click();", radio)
-                                logger.info("Selected multiple choice option")
-                                return True
-                except Exception as e:
-                    logger.debug(f"Error with radio selector {selector}: {e}")
-                    continue
+            # Reload through CDP: returns once the new document is interactive instead of
+            # waiting out every image and late script like driver.refresh() does
+            logger.info("Refreshing page to load new questions...")
+            self._navigate(self.current_exercise_url or self.driver.current_url)
             
-            return False
+            # Restart the exercise after refresh only if it didn't resume on its own
+            self._resume_exercise()
+            return True
         except Exception as e:
-            logger.error(f"Error answering multiple choice: {e}")
-            return False
-
-    def _answer_expression_enhanced(self):
-        """Enhanced expression input answering."""
-        try:
-            expression_selectors = [
-                "input[data-test-id*='expression']",
-                ".math-input input",
-                "[data-test-id*='math'] input"
-            ]
-            
-            for selector in expression_selectors:
-                try:
-                    inputs = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for input_elem in inputs:
-                        if input_elem.is_displayed() and input_elem.is_enabled():
-                            input_elem.clear()
-                            input_elem.send_keys("x")
-                            logger.info("Filled expression input")
-                            return True
-                except Exception as e:
-                    logger.debug(f"Error with expression selector {selector}: {e}")
-                    continue
-            
+            logger.error(f"Failed to refresh page: {e}")
             return False
-        except Exception as e:
-            logger.error(f"Error answering expression: {e}")
+    
+    def _soft_route_reset(self):
+        """Route the SPA to the parent page and back without reloading the document."""
+        if not self.current_exercise_url:
             return False
-
-    def _answer_generic_enhanced(self):
-        """Enhanced generic question answering."""
         try:
-            # Try any visible input fields
-            generic_selectors = [
-                "input[type='text']:not([readonly])",
-                "input[type='number']:not([readonly])",
-                "input[type='radio']",
-                "textarea:not([readonly])"
-            ]
-            
-            answered = False
-            for selector in generic_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for elem in elements:
-                        if elem.is_displayed() and elem.is_enabled():
-                            if elem.get_attribute('type') == 'radio':
-                                self.driver.execute_script("arguments[0].click();", elem)
-                                answered = True
-                                break
-                            else:
-                                elem.clear()
-                                elem.send_keys("1")
-                                answered = True
-                            time.sleep(0.3)
-                except Exception as e:
-                    logger.debug(f"Error with generic selector {selector}: {e}")
-                    continue
-            
-            if answered:
-                logger.info("Applied generic answer strategy")
-            return answered
-            
+            old_qid = self._arm_new_question()
+            parent_url = self.current_exercise_url.rstrip('/').rsplit('/', 1)[0]
+            route_to = "history.pushState({}, '', arguments[0]); dispatchEvent(new PopStateEvent('popstate'));"
+            
+            logger.info("Resetting exercise via client-side route change...")
+            self.driver.execute_script(route_to, parent_url)
+            self.wait_for_dom_settle(timeout=SOFT_RESET_TIMEOUT)
+            self.driver.execute_script(route_to, self.current_exercise_url)
+            
+            # Give up on the first step that doesn't pan out; a reload is cheaper than waiting
+            if not self._resume_exercise(timeout=SOFT_RESET_TIMEOUT):
+                logger.debug("Route change did not remount the exercise")
+                return False
+            if self.wait_for_question_change(old_qid, timeout=SOFT_RESET_TIMEOUT):
+                logger.info("Soft route reset loaded a new question")
+                return True
         except Exception as e:
-            logger.error(f"Error with generic answer strategy: {e}")
+            logger.debug("Soft route reset failed: %s", e)
+        return False
+    
+    def _resume_exercise(self, timeout=10):
+        """Wait for a question or a start button after a reload; click start only if it shows up first.
+        
+        Returns False if neither appears within timeout (capped by the question budget).
+        """
+        watched = ", ".join([QUESTION_READY_SELECTOR, *START_BUTTON_SELECTORS])
+        if not self.driver.execute_async_script(JS_WAIT_FOR_SELECTOR, watched, int(self._budget(timeout) * 1000)):
             return False
+        if self.driver.execute_script("return !!document.querySelector(arguments[0]);", QUESTION_READY_SELECTOR):
+            logger.debug("Exercise resumed without a start click")
+            return True
+        return self.start_exercise()
     
-    def refresh_page(self):
-        """Refresh the current page to get fresh questions."""
+    def refresh_via_spa(self):
+        """Load a new question through the exercise's own UI/API instead of a full page reload."""
         try:
-            logger.info("Refreshing page to load new questions...")
-            self.driver.refresh()
-            time.sleep(3)
-            
-            # Restart the exercise after refresh
-            self.start_exercise()
-            return True
+            old_qid = self._arm_new_question()
+            method = self.driver.execute_script("""
+                const btn = document.querySelector("[data-test-id='next-question'], [data-test-id='skip-question']");
+                if (btn) { btn.click(); return 'click'; }
+                if (window.__KA && window.__KA.practiceSession && window.__KA.practiceSession.requestNextItem) {
+                    window.__KA.practiceSession.requestNextItem();
+                    return 'api';
+                }
+                return null;
+            """)
+            if method:
+                logger.info(f"Requested new question in-page via {method}")
+                self.wait_for_question_change(old_qid)
+                return True
         except Exception as e:
-            logger.error(f"Failed to refresh page: {e}")
-            return False
-    
+            logger.debug("In-page refresh failed: %s", e)
+
+        # Fall back to a full reload when the SPA path is unavailable
+        return self.refresh_page()
+
     def handle_exercise_interruptions(self):
         """Handle pop-ups, completion dialogs, and other interruptions."""
         try:
-            interruption_handlers = [
-                ("Practice complete", self.handle_completion_dialog),
-                ("Congratulations", self.handle_completion_dialog),
-                ("Streak", self.handle_streak_popup),
-                ("Hint", self.handle_hint_dialog),
-                ("Error", self.handle_error_dialog),
-                ("Try again", self.handle_retry_dialog)
-            ]
+            interruption_handlers = self._interruption_handlers
             
-            page_text = self.driver.page_source.lower()
+            # With the proxy reporting interruptions, act on a signalled one first. The page
+            # scan below still covers every rule: the proxy can't announce hint/error/retry
+            # dialogs, and a signalled dialog may not have rendered when its signal arrived
+            if self.interruption_listener is not None:
+                try:
+                    key = self.interruption_listener.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                else:
+                    handler = interruption_handlers.get(key)
+                    if handler:
+                        logger.info("Handling signalled interruption: %s", key)
+                        return handler()
+            
+            # Detect and dismiss in the same script so the DOM cannot change in between
+            result = self._ka_call('resolveInterruption', INTERRUPTION_RULES)
+            if not result:
+                return True
             
-            for text, handler in interruption_handlers:
-                if text.lower() in page_text:
-                    logger.info(f"Handling interruption: {text}")
-                    return handler()
-            return True
+            key = result["kind"]
+            if result["clicked"]:
+                logger.info("Dismissed interruption: %s", key)
+                return True
+            
+            # Nothing to click; let the handler apply its fallback (e.g. refresh on completion)
+            logger.info("Handling interruption: %s", key)
+            return interruption_handlers[key]()
         except Exception as e:
             logger.error(f"Error handling interruptions: {e}")
             return True  # Continue anyway
     
+    def _click_first(self, selectors, texts=(), scope='button, a'):
+        """Click the first enabled, rendered match for any selector or text in one round-trip."""
+        return bool(self._ka_call('clickFirstEnabled', list(selectors), list(texts), scope))
+
+    def _dismiss_dialog(self, kind, scope='button, a'):
+        """Click the dismiss button of an INTERRUPTION_RULES dialog; True if one was clicked."""
+        selector, texts = DIALOG_BUTTONS[kind]
+        return self._click_first([selector], texts, scope)
+
     def handle_completion_dialog(self):
         """Handle exercise completion dialogs."""
         try:
             # Look for restart or continue buttons
-            restart_selectors = [
-                "button[data-test-id='restart']",
-                "button:contains('Start over')",
-                "button:contains('Restart')",
-                "a[href*='restart']"
-            ]
-            
-            for selector in restart_selectors:
-                try:
-                    if ":contains" in selector:
-                        element = self.driver.execute_script(f"""
-                            return Array.from(document.querySelectorAll('button, a')).find(el => 
-                                el.textContent.toLowerCase().includes('{selector.split("'")[1].lower()}'));
-                        """)
-                        if element:
-                            self.driver.execute_script("arguments[0].click();", element)
-                            logger.info("Restarted exercise from completion dialog")
-                            return True
-                    else:
-                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        element.click()
-                        logger.info("Restarted exercise from completion dialog")
-                        return True
-                except Exception:
-                    continue
+            if self._dismiss_dialog("practice complete"):
+                logger.info("Restarted exercise from completion dialog")
+                return True
             
             # If no restart button, refresh the page
             logger.info("No restart button found, refreshing page")
@@ -1051,120 +1583,49 @@ class KhanAcademyBrowserAutomation:
         """Handle streak celebration popups."""
         try:
             # Look for continue or dismiss buttons
-            dismiss_selectors = [
-                "button[data-test-id='continue']",
-                "button[data-test-id='dismiss']",
-                ".modal button",
-                "button:contains('Continue')"
-            ]
-            
-            for selector in dismiss_selectors:
-                try:
-                    if ":contains" in selector:
-                        element = self.driver.execute_script(f"""
-                            return Array.from(document.querySelectorAll('button')).find(el => 
-                                el.textContent.toLowerCase().includes('continue'));
-                        """)
-                        if element:
-                            self.driver.execute_script("arguments[0].click();", element)
-                            logger.info("Dismissed streak popup")
-                            return True
-                    else:
-                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        element.click()
-                        logger.info("Dismissed streak popup")
-                        return True
-                except Exception:
-                    continue
+            if self._dismiss_dialog("streak", scope='button'):
+                logger.info("Dismissed streak popup")
             
             return True  # Continue even if can't dismiss
         except Exception as e:
-            logger.debug(f"Error handling streak popup: {e}")
+            logger.debug("Error handling streak popup: %s", e)
             return True
     
     def handle_hint_dialog(self):
         """Handle hint dialogs."""
         try:
             # Look for close or skip hint buttons
-            close_selectors = [
-                "button[data-test-id='close-hint']",
-                "button[data-test-id='skip-hint']", 
-                ".hint-dialog button",
-                "button:contains('Skip')"
-            ]
-            
-            for selector in close_selectors:
-                try:
-                    element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    element.click()
-                    logger.info("Closed hint dialog")
-                    return True
-                except Exception:
-                    continue
+            if self._dismiss_dialog("hint"):
+                logger.info("Closed hint dialog")
             
             return True
         except Exception as e:
-            logger.debug(f"Error handling hint dialog: {e}")
+            logger.debug("Error handling hint dialog: %s", e)
             return True
     
     def handle_error_dialog(self):
         """Handle error dialogs."""
         try:
             # Look for OK or dismiss buttons
-            ok_selectors = [
-                "button[data-test-id='ok']",
-                "button[data-test-id='dismiss']",
-                ".error-dialog button",
-                "button:contains('OK')"
-            ]
-            
-            for selector in ok_selectors:
-                try:
-                    element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    element.click()
-                    logger.info("Dismissed error dialog")
-                    return True
-                except Exception:
-                    continue
+            if self._dismiss_dialog("error"):
+                logger.info("Dismissed error dialog")
             
             return True
         except Exception as e:
-            logger.debug(f"Error handling error dialog: {e}")
+            logger.debug("Error handling error dialog: %s", e)
             return True
     
     def handle_retry_dialog(self):
         """Handle retry/try again dialogs."""
         try:
-            # Look for try again or continue buttons
-            retry_selectors = [
-                "button[data-test-id='try-again']",
-                "button[data-test-id='retry']",
-                "button:contains('Try again')",
-                "button:contains('Continue')"
-            ]
-            
-            for selector in retry_selectors:
-                try:
-                    if ":contains" in selector:
-                        element = self.driver.execute_script(f"""
-                            return Array.from(document.querySelectorAll('button')).find(el => 
-                                el.textContent.toLowerCase().includes('{selector.split("'")[1].lower()}'));
-                        """)
-                        if element:
-                            self.driver.execute_script("arguments[0].click();", element)
-                            logger.info("Clicked try again")
-                            return True
-                    else:
-                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        element.click()
-                        logger.info("Clicked try again")
-                        return True
-                except Exception:
-                    continue
+            # Look for try again or continue buttons; the same question stays up afterwards
+            if self._dismiss_dialog("try again", scope='button'):
+                logger.info("Clicked try again")
+                self._wait_for_retry_closed()
             
             return True
         except Exception as e:
-            logger.debug(f"Error handling retry dialog: {e}")
+            logger.debug("Error handling retry dialog: %s", e)
             return True
     
     def attempt_to_progress_to_next_question(self):
@@ -1173,47 +1634,21 @@ class KhanAcademyBrowserAutomation:
         """
         try:
             # Method 1: Look for "Next" or "Continue" buttons
-            progress_selectors = [
-                "button[data-test-id='next-question']",
-                "button[data-test-id='continue']",
-                "a[data-test-id='next-question']",
-                "button:contains('Next')",
-                "button:contains('Continue')",
-                ".next-button",
-                ".continue-button"
-            ]
-            
-            for selector in progress_selectors:
-                try:
-                    if ":contains" in selector:
-                        element = self.driver.execute_script(f"""
-                            return Array.from(document.querySelectorAll('button, a')).find(el => 
-                                el.textContent.toLowerCase().includes('{selector.split("'")[1].lower()}'));
-                        """)
-                        if element and element.is_displayed():
-                            self.driver.execute_script("arguments[0].click();", element)
-                            logger.info(f"Progressed using: {selector}")
-                            time.sleep(3)
-                            return True
-                    else:
-                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if element.is_displayed() and element.is_enabled():
-                            element.click()
-                            logger.info(f"Progressed using: {selector}")
-                            time.sleep(3)
-                            return True
-                except Exception:
-                    continue
+            old_qid = self._arm_new_question()
+            if self._click_first(PROGRESS_SELECTORS, PROGRESS_TEXTS):
+                logger.debug("Progressed to next question")
+                self.wait_for_question_change(old_qid)
+                return True
             
             # Method 2: If we can't find progress buttons, try refreshing to get new questions
             logger.info("No progress buttons found, will refresh to get new questions")
             return False
             
         except Exception as e:
-            logger.debug(f"Could not progress to next question: {e}")
+            logger.debug("Could not progress to next question: %s", e)
             return False
     
-    def automate_exercise_session(self, exercise_url, max_questions=1000, refresh_interval=300):
+    def automate_exercise_session(self, exercise_url, max_questions=1000, refresh_interval=300, keep_browser=False):
         """
         Run a comprehensive automated session for an exercise with improved UI interactions.
         
@@ -1221,8 +1656,9 @@ class KhanAcademyBrowserAutomation:
             exercise_url: URL of the Khan Academy exercise
             max_questions: Maximum number of questions to capture
             refresh_interval: How often to refresh if no progress (seconds) - increased default
+            keep_browser: Leave the browser running for the next session instead of quitting
         """
-        if not self.setup_browser():
+        if not self.ensure_browser():
             return False
 
         try:
@@ -1243,8 +1679,7 @@ class KhanAcademyBrowserAutomation:
             logger.info(f"Starting automated session - target: {max_questions} questions")
 
             while questions_progressed < max_questions_per_session and consecutive_failures < 5:
-                cycle_start = time.time()
-                logger.info(f"Question {questions_progressed + 1}/{max_questions_per_session}")
+                logger.debug("Question %s/%s", questions_progressed + 1, max_questions_per_session)
 
                 # Handle any interruptions first
                 if not self.handle_exercise_interruptions():
@@ -1254,34 +1689,38 @@ class KhanAcademyBrowserAutomation:
                 if not self.wait_for_question_load():
                     logger.warning("Question load timeout, attempting to continue")
 
-                # Try to progress to next question using improved UI interactions
-                if self.progress_to_next_question():
+                # Try to progress to next question using improved UI interactions, within
+                # a fixed budget so a stuck step fails fast instead of stacking timeouts
+                self._question_deadline = time.monotonic() + QUESTION_TIME_BUDGET
+                try:
+                    progressed = self.progress_to_next_question()
+                finally:
+                    self._question_deadline = None
+                if progressed:
                     questions_progressed += 1
                     consecutive_failures = 0
-                    logger.info(f"Successfully progressed to question {questions_progressed + 1}")
+                    logger.debug("Successfully progressed to question %s", questions_progressed + 1)
                     
-                    # Brief pause between questions to allow for data capture
-                    time.sleep(3)
+                    # Milestone progress only; per-question detail is at debug level
+                    if questions_progressed % PROGRESS_LOG_INTERVAL == 0:
+                        logger.info("Progress update: %d questions completed", questions_progressed)
                 else:
                     consecutive_failures += 1
-                    logger.warning(f"Failed to progress (failure #{consecutive_failures})")
+                    logger.warning("Failed to progress (failure #%d)", consecutive_failures)
                     
-                    # If we've had several failures, try refresh as fallback
+                    # Recover early on a repeat failure; the 5-failure limit still stops persistent ones
                     current_time = time.time()
-                    if consecutive_failures >= 3 or (current_time - last_refresh_time) > refresh_interval:
+                    if consecutive_failures >= 2 or (current_time - last_refresh_time) > refresh_interval:
                         logger.info("Multiple failures detected, refreshing page as fallback...")
-                        if self.refresh_page():
+                        if self.refresh_via_spa():
                             last_refresh_time = current_time
                             consecutive_failures = 0
-                            time.sleep(5)  # Allow page to settle after refresh
+                            self.wait_for_dom_settle(timeout=5)  # Allow page to settle after refresh
                         else:
                             logger.error("Failed to refresh page")
                             break
-
-                # Progress reporting every 5 questions
-                if questions_progressed % 5 == 0 and questions_progressed > 0:
-                    elapsed = time.time() - cycle_start
-                    logger.info(f"Progress update: {questions_progressed} questions completed")
+                    else:
+                        time.sleep(backoff_delay(consecutive_failures - 1))
 
             if consecutive_failures >= 5:
                 logger.error("Too many consecutive failures, stopping session")
@@ -1294,27 +1733,244 @@ class KhanAcademyBrowserAutomation:
             logger.error(f"Automation session failed: {e}")
             return False
         finally:
-            self.cleanup()
+            if keep_browser:
+                self._stop_capture()
+            else:
+                self.cleanup()
+    
+    @classmethod
+    def scrape_many(cls, exercise_urls, max_concurrency=4, proxy_port=8080):
+        """
+        Scrape several exercises concurrently, each worker borrowing a browser from a shared pool.
+        
+        Selenium calls block, so workers are threads; each spends nearly all its time
+        waiting on the browser, so max_concurrency is bounded by browser memory rather
+        than CPU. All browsers share one mitmproxy, which keeps each exercise's capture
+        session apart by its start/stop signal.
+        
+        Returns:
+            Dict mapping each exercise URL to whether its session succeeded
+        """
+        pool = BrowserPool(proxy_port, size=max_concurrency)
+        
+        def run_worker(exercise_url):
+            return cls(proxy_port, pool=pool).automate_exercise_session(exercise_url)
+        
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                futures = {executor.submit(run_worker, url): url for url in exercise_urls}
+                # Record each exercise as it finishes; one failure doesn't discard the rest
+                for future in as_completed(futures):
+                    url = futures[future]
+                    try:
+                        results[url] = bool(future.result())
+                    except Exception as e:
+                        logger.error(f"Session for {url} failed: {e}")
+                        results[url] = False
+                    logger.info(f"Finished {len(results)}/{len(futures)} exercises")
+            return results
+        finally:
+            pool.close()
     
     def cleanup(self):
         """Clean up browser resources."""
+        if self.interruption_listener is not None:
+            self.interruption_listener.stop()
+            self.interruption_listener = None
         if self.driver:
             try:
+                self._stop_capture()
+                if self.pool is not None:
+                    # Hand the browser back warm; the pool resets or recycles it
+                    self.pool.release(self.driver)
+                    self.driver = None
+                    return
                 self.driver.quit()
                 logger.info("Browser cleanup completed")
             except Exception as e:
                 logger.error(f"Error during browser cleanup: {e}")
 
-def run_automation(exercise_url, proxy_port=8080):
+class BrowserPool:
+    """Keeps configured Chrome instances alive between automation sessions.
+    
+    Drivers are created lazily up to size, reset to a blank, cookie-free page when
+    released, and quit after max_uses sessions so long runs don't accumulate memory.
+    """
+    
+    def __init__(self, proxy_port=8080, size=POOL_SIZE, max_uses=MAX_USES_PER_INSTANCE):
+        self.size = size
+        self.max_uses = max_uses
+        self._launcher = KhanAcademyBrowserAutomation(proxy_port)
+        self._idle = []
+        self._uses = {}
+        self._created = 0
+        # Guards _idle, _uses and _created; notified whenever a driver or a launch slot frees up
+        self._available = threading.Condition()
+    
+    def acquire(self, timeout=None):
+        """Return an idle driver, launching one if under size, else wait for a release or discard.
+        
+        Raises queue.Empty if nothing becomes available within timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._available:
+            while not self._idle and self._created >= self.size:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._available.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+            created = self._created
+        
+        try:
+            driver = self._launcher._create_driver()
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+        with self._available:
+            self._uses[id(driver)] = 0
+        logger.info(f"Browser pool launched instance {created}/{self.size}")
+        return driver
+    
+    def release(self, driver):
+        """Reset a driver and return it to the pool, or quit it once it has been used max_uses times."""
+        with self._available:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+        if uses < self.max_uses:
+            try:
+                driver.delete_all_cookies()
+                driver.get("about:blank")
+                with self._available:
+                    self._idle.append(driver)
+                    self._available.notify()
+                return
+            except WebDriverException as e:
+                logger.warning(f"Pooled browser failed to reset, discarding it: {e}")
+        self._discard(driver)
+    
+    def _discard(self, driver):
+        """Quit a driver and free its slot so a waiting acquire can launch a replacement."""
+        with self._available:
+            self._uses.pop(id(driver), None)
+            self._created -= 1
+            self._available.notify()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def close(self):
+        """Quit every idle driver."""
+        with self._available:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+def chromedriver_path():
+    """Return the ChromeDriver binary path, resolving it through webdriver_manager only once."""
+    global _DRIVER_PATH
+    with _DRIVER_PATH_LOCK:
+        if _DRIVER_PATH is None or not os.path.exists(_DRIVER_PATH):
+            _DRIVER_PATH = ChromeDriverManager().install()
+        return _DRIVER_PATH
+
+def profile_in_use(profile):
+    """True if a live Chrome on this host holds profile.
+    
+    Only Chrome's POSIX SingletonLock is checked; a lock left by a crashed Chrome (dead
+    pid) doesn't count, and anything else is left to Chrome's own lock handling.
+    """
+    if os.name != "posix":
+        return False
+    try:
+        host, _, pid = os.readlink(os.path.join(profile, PROFILE_LOCK_NAME)).rpartition("-")
+        pid = int(pid)
+    except (OSError, ValueError):
+        return False
+    if host != socket.gethostname():
+        return True  # Held from another machine sharing the directory; can't check it
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Alive, owned by another user
+    return True
+
+def persistent_profile_dir(user_data_dir=None):
+    """Return the Chrome profile directory for a run.
+
+    Uses user_data_dir, else KHAN_BROWSER_PROFILE_DIR, else chrome_profile_ka in the
+    current directory. If a live Chrome already holds that profile, the first free
+    numbered sibling (<profile>-2, <profile>-3, ...) is used instead, so concurrent runs
+    don't fail on the profile lock and each sibling keeps its cache for later runs.
+    """
+    base = user_data_dir or os.environ.get("KHAN_BROWSER_PROFILE_DIR") or os.path.join(os.getcwd(), PERSISTENT_PROFILE_NAME)
+    profile, index = base, 1
+    while profile_in_use(profile):
+        index += 1
+        profile = f"{base}-{index}"
+    if profile != base:
+        logger.info(f"Profile {base} is in use; using {profile}")
+    return profile
+
+def mitmproxy_ca_spki():
+    """Return the base64 SHA-256 SPKI fingerprint of mitmproxy's CA, or None if unavailable."""
+    try:
+        # cryptography ships with mitmproxy
+        from cryptography import x509
+        from cryptography.hazmat.primitives import serialization
+        with open(MITMPROXY_CA_CERT, "rb") as f:
+            cert = x509.load_pem_x509_certificate(f.read())
+        spki = cert.public_key().public_bytes(
+            serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return base64.b64encode(hashlib.sha256(spki).digest()).decode("ascii")
+    except Exception as e:
+        logger.debug("mitmproxy CA fingerprint unavailable: %s", e)
+        return None
+
+def certificate_arguments():
+    """Chrome flags that let TLS through the mitmproxy MITM.
+    
+    Pinning the CA keeps normal verification (and session resumption) for everything
+    else; blanket --ignore-certificate-errors is only used until mitmproxy has
+    generated its CA.
+    """
+    spki = mitmproxy_ca_spki()
+    if spki:
+        return [f'--ignore-certificate-errors-spki-list={spki}']
+    logger.warning(f"mitmproxy CA not found at {MITMPROXY_CA_CERT}; ignoring all certificate errors")
+    return ['--ignore-certificate-errors']
+
+def backoff_delay(attempt):
+    """Exponential backoff with jitter so concurrent workers don't retry in lockstep."""
+    return min(BACKOFF_MAX_DELAY, (2 ** attempt) + random.uniform(0, 1))
+
+def run_automation(exercise_url, proxy_port=8080, user_data_dir=None):
     """
     Run browser automation for question extraction.
     
     Args:
-        exercise_url: Khan Academy exercise URL
+        exercise_url: Khan Academy exercise URL, or a list of them to run back to back
+            in one warm browser
         proxy_port: Port where mitmproxy is running
+        user_data_dir: Chrome profile to reuse; defaults to persistent_profile_dir()
     """
-    automation = KhanAcademyBrowserAutomation(proxy_port)
-    return automation.automate_exercise_session(exercise_url)
+    automation = KhanAcademyBrowserAutomation(proxy_port, user_data_dir=persistent_profile_dir(user_data_dir))
+    if isinstance(exercise_url, str):
+        return automation.automate_exercise_session(exercise_url)
+    
+    try:
+        return {url: automation.automate_exercise_session(url, keep_browser=True) for url in exercise_url}
+    finally:
+        automation.cleanup()
 
 if __name__ == "__main__":
     # Example usage
@@ -7,12 +7,23 @@ Optimized for network performance and reduced timeouts.
 
 import json
 import os
+import queue
+import re
 import requests
 from mitmproxy import http, ctx
 from datetime import datetime
 from typing import Set, Dict, Optional
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson parses and serializes several times faster than the stdlib; optional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # --- Configuration ---
 SAVE_DIRECTORY = "khan_academy_json"
@@ -24,6 +35,36 @@ TIMEOUT = 15  # Reduced timeout for faster failure detection
 # Performance optimization settings
 ENABLE_ACTIVE_SCRAPING = True  # Enable active batch scraping
 MAX_CONCURRENT_REQUESTS = 3  # Limit concurrent requests to avoid overload
+WRITE_BATCH_SIZE = 32  # Max queued question files written per background writer pass
+WRITE_WORKERS = 4  # Files of one batch are written in parallel by this many threads
+WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Sentinel hosts the browser automation requests to bracket an exercise session
+START_CAPTURE_HOST = "startlogging"
+STOP_CAPTURE_HOST = "stoplogging"
+
+# Lower-cased GraphQL operation names that deliver a practice manifest / a single question
+MANIFEST_OPERATIONS = frozenset({
+    "getorcreatepracticetask", "createpracticetask", "practiceitemspreload",
+    "practiceitemsforassessment", "getassessmentitemsforexercise",
+    "getpracticeitems", "getpracticeitemsforuser"
+})
+ASSESSMENT_ITEM_OPERATIONS = frozenset({"getassessmentitem", "assessmentitem"})
+
+GRAPHQL_PATH = "/api/internal/graphql"
+
+# fkey value in a Cookie header
+FKEY_RE = re.compile(r'(?i)fkey=([^;]+)')
+
+# Fields that may carry question IDs in manifests with an unexpected shape.
+# Prefer IDs that look like Perseus item ids: e.g., x4199a21da4572c96
+# One alternation so the body is scanned once; group 1 is an assessmentitem| reference,
+# group 2 an id/itemId/contentId field value, both without the 'x' prefix. Matches raw
+# response bytes.
+QUESTION_ID_RE = re.compile(
+    rb'assessmentitem\|x?([a-f0-9]{16})'
+    rb'|"(?:id|itemId|contentId)":\s*"x?([a-f0-9]{16})"'
+)
 
 # --- Global State ---
 questions_to_capture: Set[str] = set()
@@ -34,11 +75,46 @@ questions_captured_count = 0
 if not os.path.exists(SAVE_DIRECTORY):
     os.makedirs(SAVE_DIRECTORY)
 
+
+def json_loads(data):
+    """Parse JSON from str or bytes. orjson.JSONDecodeError subclasses json.JSONDecodeError."""
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def json_dump_bytes(obj) -> bytes:
+    """Serialize obj as 2-space indented UTF-8 JSON, identical in layout with or without orjson."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def find_reserved_items(data) -> Optional[list]:
+    """Return the first reservedItems list anywhere in a response, searched iteratively."""
+    stack = deque([data])
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            items = obj.get('reservedItems')
+            if isinstance(items, list):
+                return items
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return None
+
+
 class KhanAcademyCapture:
     def __init__(self):
         self.base_headers: Optional[Dict[str, str]] = None
         self.active_requests = 0  # Track concurrent requests
         self.request_lock = threading.Lock()  # Thread safety
+        self.capture_enabled = True  # Toggled by sentinel requests from the browser
+        self.capture_sessions: Set[str] = set()  # Exercises currently bracketed by start/stop
+        # Question files are written by one background thread so hooks never wait on disk
+        self._save_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._write_pool = ThreadPoolExecutor(max_workers=WRITE_WORKERS)
+        self._writer = threading.Thread(target=self._drain_writes, daemon=True)
+        self._writer.start()
         self.log(f"[INFO] Khan Academy JSON Capture addon loaded")
         self.log(f"[INFO] Save directory: {SAVE_DIRECTORY}")
         self.log(f"[INFO] Active batch scraping: {'ENABLED' if ENABLE_ACTIVE_SCRAPING else 'DISABLED'}")
@@ -76,37 +152,62 @@ class KhanAcademyCapture:
         except Exception:
             return False
 
-    def response(self, flow: http.HTTPFlow) -> None:
-        """Main response handler for mitmproxy - optimized for performance."""
-
-        # Skip processing non-Khan Academy requests to reduce overhead
-        if "khanacademy.org" not in flow.request.pretty_host:
+    def request(self, flow: http.HTTPFlow) -> None:
+        """Answer capture start/stop sentinel requests locally without contacting any server."""
+        host = flow.request.pretty_host
+        if host not in (START_CAPTURE_HOST, STOP_CAPTURE_HOST):
             return
 
-        # Only consider GraphQL endpoint; determine operation by inspecting body
-        if "/api/internal/graphql" not in flow.request.path:
-            return
-
-        operation_name = None
+        # Pooled browsers run several exercises at once; stay enabled until the last one stops
+        session = flow.request.path.lstrip('/')
+        if host == START_CAPTURE_HOST:
+            self.capture_sessions.add(session)
+        else:
+            self.capture_sessions.discard(session)
+        self.capture_enabled = bool(self.capture_sessions)
+        self.log(f"[MITM] Capture {'started' if host == START_CAPTURE_HOST else 'stopped'}: {session}")
+        flow.response = http.Response.make(204, b"", {"Access-Control-Allow-Origin": "*"})
+
+    def _operation_name(self, request: http.Request, path: str) -> Optional[str]:
+        """GraphQL operation name of a request, read from the URL when present, else the body."""
+        # Khan Academy names the operation in the path: /api/internal/graphql/<operationName>?...
+        name = path.split(GRAPHQL_PATH, 1)[1].lstrip("/").split("?", 1)[0]
+        if name:
+            return name
         try:
             # Some KA requests send JSON bodies; parse safely
-            req_text = flow.request.get_text(strict=False)
-            if req_text:
-                body = json.loads(req_text)
+            req_body = request.content
+            if req_body:
+                body = json_loads(req_body)
                 # Body may be a single operation or an array; handle both
                 if isinstance(body, list) and body:
-                    operation_name = body[0].get("operationName")
+                    return body[0].get("operationName")
                 elif isinstance(body, dict):
-                    operation_name = body.get("operationName")
+                    return body.get("operationName")
         except Exception:
-            operation_name = None
+            pass
+        return None
+
+    def response(self, flow: http.HTTPFlow) -> None:
+        """Main response handler for mitmproxy - optimized for performance."""
+
+        # Ignore all traffic outside a start/stop sentinel bracket
+        if not self.capture_enabled:
+            return
+
+        # Skip processing non-Khan Academy and non-GraphQL requests before any other work
+        request = flow.request
+        if "khanacademy.org" not in request.pretty_host:
+            return
+        path = request.path
+        if GRAPHQL_PATH not in path:
+            return
+
+        operation_name = self._operation_name(request, path)
+        operation = operation_name.lower() if operation_name else None
 
         # --- Part 1: Capture the manifest and trigger active scraping ---
-        if operation_name and operation_name.lower() in {
-            "getorcreatepracticetask", "createpracticetask", "practiceitemspreload",
-            "practiceitemsforassessment", "getassessmentitemsforexercise",
-            "getpracticeitems", "getpracticeitemsforuser"
-        }:
+        if operation in MANIFEST_OPERATIONS:
             self.log(f"[MITM] Detected practice manifest operation: {operation_name}")
             if ENABLE_ACTIVE_SCRAPING:
                 threading.Thread(target=self.handle_practice_task, args=(flow,), daemon=True).start()
@@ -114,32 +215,23 @@ class KhanAcademyCapture:
                 self.handle_practice_task(flow)
 
         # --- Part 2: Capture individual question JSONs (passive backup) ---
-        elif operation_name and operation_name.lower() in {"getassessmentitem", "assessmentitem"}:
+        elif operation in ASSESSMENT_ITEM_OPERATIONS:
             self.log("[MITM] Detected assessmentItem response; saving passively")
             threading.Thread(target=self.handle_assessment_item, args=(flow,), daemon=True).start()
         else:
-            # Fallback: attempt to detect assessmentItem directly from response body
-            try:
-                # Mitm may stream; ensure bytes -> JSON safely
-                resp_text = flow.response.get_text(strict=False)
-                resp_data = json.loads(resp_text) if resp_text else None
-                if isinstance(resp_data, dict) and 'data' in resp_data and isinstance(resp_data['data'], dict) and 'assessmentItem' in resp_data['data']:
-                    self.log("[MITM] Fallback matched assessmentItem in response body")
-                    threading.Thread(target=self.handle_assessment_item, args=(flow,), daemon=True).start()
-            except Exception:
-                pass
-        
-        # Additional check for any Khan Academy response that might contain assessment data
-        if flow.request.method == "POST" and "khanacademy.org" in flow.request.pretty_host:
+            # Fallback: detect assessment data directly in the response body. A byte search
+            # rules out most bodies without decoding; the rest are parsed once and the
+            # parsed data goes straight to the saver instead of being parsed again.
+            content = flow.response.content
+            if not content or (b"assessmentItem" not in content and b"itemData" not in content):
+                return
             try:
-                resp_text = flow.response.get_text(strict=False)
-                if resp_text and ("assessmentItem" in resp_text or "itemData" in resp_text):
-                    resp_data = json.loads(resp_text)
-                    if isinstance(resp_data, dict) and self.contains_assessment_data(resp_data):
-                        self.log("[MITM] Found assessment data in response, attempting to save")
-                        threading.Thread(target=self.handle_assessment_item, args=(flow,), daemon=True).start()
-            except Exception:
-                pass
+                resp_data = json_loads(content)
+            except ValueError:
+                return
+            if isinstance(resp_data, dict) and self.contains_assessment_data(resp_data):
+                self.log("[MITM] Found assessment data in response, attempting to save")
+                threading.Thread(target=self.save_item_json, args=(resp_data,), daemon=True).start()
 
     def handle_practice_task(self, flow: http.HTTPFlow):
         """Handle practice task response and trigger active batch scraping."""
@@ -147,7 +239,7 @@ class KhanAcademyCapture:
         self.log("[INFO] Practice Task detected. Building and actively fetching questions...")
         
         try:
-            data = json.loads(flow.response.content)
+            data = json_loads(flow.response.content)
         except json.JSONDecodeError:
             self.log("[ERROR] Could not parse practice task JSON")
             return
@@ -155,14 +247,8 @@ class KhanAcademyCapture:
         # Store headers from a legitimate flow to use in our forged requests
         cookie_header = flow.request.headers.get('Cookie', '')
         # Extract fkey from cookies if present
-        fkey_value = ''
-        try:
-            import re
-            m = re.search(r'(?i)fkey=([^;]+)', cookie_header)
-            if m:
-                fkey_value = m.group(1)
-        except Exception:
-            pass
+        m = FKEY_RE.search(cookie_header)
+        fkey_value = m.group(1) if m else ''
 
         xka = flow.request.headers.get('X-KA-FKey') or flow.request.headers.get('x-ka-fkey') or fkey_value
         referer = flow.request.headers.get('Referer', 'https://www.khanacademy.org/')
@@ -192,35 +278,15 @@ class KhanAcademyCapture:
             try:
                 reserved_items = data['data']['getOrCreatePracticeTask']['result']['userTask']['task']['reservedItems']
             except Exception:
-                # Fallbacks: search alternative known response paths
-                for path in (
-                    ('data', 'practiceItemsPreload', 'reservedItems'),
-                    ('data', 'getPracticeItems', 'reservedItems'),
-                    ('data', 'getAssessmentItemsForExercise', 'reservedItems'),
-                ):
-                    ref = data
-                    ok = True
-                    for key in path:
-                        if isinstance(ref, dict) and key in ref:
-                            ref = ref[key]
-                        else:
-                            ok = False
-                            break
-                    if ok and isinstance(ref, list):
-                        reserved_items = ref
-                        break
+                # Fallback: other manifest operations nest reservedItems differently
+                reserved_items = find_reserved_items(data)
 
             if not isinstance(reserved_items, list):
                 raise KeyError("reservedItems not found")
-            new_ids = set()
-            
-            for item in reserved_items:
-                # Extract question ID from format like "assessmentitem|question_id"
-                if '|' in item:
-                    item_id = item.split('|')[1]
-                    if item_id not in questions_to_capture:
-                        new_ids.add(item_id)
-                        questions_to_capture.add(item_id)
+
+            # Extract question IDs from format like "assessmentitem|question_id"
+            new_ids = {item.split('|')[1] for item in reserved_items if '|' in item} - questions_to_capture
+            questions_to_capture.update(new_ids)
 
             self.log(f"[MITM] Found {len(new_ids)} new question IDs.")
             
@@ -236,41 +302,24 @@ class KhanAcademyCapture:
         except (KeyError, TypeError, IndexError) as e:
             self.log(f"[ERROR] Could not find question IDs in manifest. Error: {e}")
             # Try alternative parsing methods
-            self.try_alternative_parsing(data)
+            self.try_alternative_parsing(flow.response.content)
 
-    def try_alternative_parsing(self, data: dict):
+    def try_alternative_parsing(self, content: bytes):
         """Try alternative methods to extract question IDs."""
         try:
-            # Look for any field containing question IDs
-            data_str = json.dumps(data)
-            import re
-            
-            # Look for patterns that might be question IDs
-            # Prefer IDs that look like Perseus item ids: e.g., x4199a21da4572c96
-            patterns = [
-                r'assessmentitem\|(x?[a-f0-9]{16})',
-                r'"id":\s*"(x?[a-f0-9]{16})"',
-                r'"itemId":\s*"(x?[a-f0-9]{16})"',
-                r'"contentId":\s*"(x?[a-f0-9]{16})"'
-            ]
-            
-            found_ids = set()
-            for pattern in patterns:
-                matches = re.findall(pattern, data_str)
-                found_ids.update(matches)
-            
+            # Look for patterns that might be question IDs in the raw body,
+            # rather than re-serializing the already parsed data; one deduplicating pass
+            # that also normalizes every ID to include the 'x' prefix
+            found_ids = {'x' + (m.group(1) or m.group(2)).decode('ascii')
+                         for m in QUESTION_ID_RE.finditer(content)}
+
             if found_ids:
                 self.log(f"[INFO] Found {len(found_ids)} questions using alternative parsing")
                 self.log(f"[INFO] Active fetching disabled - will wait for passive capture")
                 self.log(f"[INFO] Questions discovered: {list(found_ids)}")
                 # Store IDs but don't actively fetch due to GraphQL restrictions
-                for item_id in found_ids:
-                    # Normalize to include 'x' prefix if missing
-                    if not item_id.startswith('x'):
-                        item_id = 'x' + item_id
-                    if item_id not in questions_to_capture:
-                        questions_to_capture.add(item_id)
-                        
+                questions_to_capture.update(found_ids)
+
         except Exception as e:
             self.log(f"[ERROR] Alternative parsing failed: {e}")
 
@@ -383,7 +432,7 @@ class KhanAcademyCapture:
         """
         Centralized function to handle the saving logic.
         """
-        global saved_questions, questions_captured_count
+        global saved_questions
         
         try:
             # Extract the assessment item data - try multiple possible structures
@@ -410,25 +459,67 @@ class KhanAcademyCapture:
                 return
             saved_questions.add(item_id)
 
-            # Parse the Perseus data
-            perseus_data = json.loads(item_data_raw)
+            # Parse the Perseus data and hand it to the background writer
+            perseus_data = json_loads(item_data_raw)
+            self._save_queue.put_nowait((item_id, perseus_data))
 
-            # Save to file unconditionally so browsing saves all questions
-            filename = os.path.join(SAVE_DIRECTORY, f"{item_id}.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(perseus_data, f, ensure_ascii=False, indent=4)
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            # Ignore if the JSON is not what we expect
+            pass
+
+    def _drain_writes(self) -> None:
+        """Writer thread: take queued saves in batches of up to WRITE_BATCH_SIZE until stopped."""
+        while True:
+            batch = [self._save_queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._save_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self._write_batch([entry for entry in batch if entry is not None])
+            if stop:
+                return
+
+    @staticmethod
+    def _write_file(item_id: str, perseus_data) -> Optional[Exception]:
+        """Write one question file with raw open/write/close calls; return the error, if any."""
+        try:
+            payload = memoryview(json_dump_bytes(perseus_data))
+            fd = os.open(os.path.join(SAVE_DIRECTORY, f"{item_id}.json"), WRITE_FLAGS, 0o644)
+            try:
+                while payload:
+                    payload = payload[os.write(fd, payload):]
+            finally:
+                os.close(fd)
+        except (OSError, TypeError) as e:
+            return e
+        return None
+
+    def _write_batch(self, batch: list) -> None:
+        """Save each (item_id, perseus_data) pair to its own file, the whole batch in parallel."""
+        global questions_captured_count
+
+        # Save to file unconditionally so browsing saves all questions
+        errors = self._write_pool.map(lambda entry: self._write_file(*entry), batch)
+        for (item_id, _), error in zip(batch, errors):
+            if error is not None:
+                self.log(f"[ERROR] Could not save {item_id}.json: {error}")
+                continue
 
             questions_captured_count += 1
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             self.log(f"[SAVE] {item_id}.json  Total saved: {questions_captured_count} ({timestamp})")
-            
+
             # Check if we've reached our limit
             if questions_captured_count >= MAX_QUESTIONS:
                 self.log(f"[INFO] Reached maximum question limit ({MAX_QUESTIONS})")
 
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
-            # Ignore if the JSON is not what we expect
-            pass
+    def done(self) -> None:
+        """Flush pending question files before mitmproxy shuts down."""
+        self._save_queue.put(None)
+        self._writer.join(timeout=10)
+        self._write_pool.shutdown(wait=False)
 
     def handle_assessment_item(self, flow: http.HTTPFlow):
         """
@@ -436,7 +527,7 @@ class KhanAcademyCapture:
         This function now just acts as a passive backup.
         """
         try:
-            data = json.loads(flow.response.content)
+            data = json_loads(flow.response.content)
             self.save_item_json(data)
         except json.JSONDecodeError:
             pass
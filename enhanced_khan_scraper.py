@@ -14,6 +14,7 @@ import sys
 import logging
 import asyncio
 from browser_automation import KhanAcademyBrowserAutomation
+from khan_signals import SIGNAL_PORT
 
 # Try to import autonomous scraper
 try:
@@ -97,10 +98,13 @@ class EnhancedKhanScraper:
         """Start mitmproxy with the enhanced addon."""
         try:
             addon_path = os.path.join(os.getcwd(), "capture_khan_json.py")
+            signals_path = os.path.join(os.getcwd(), "khan_signals.py")
+            cache_path = os.path.join(os.getcwd(), "khan_response_cache.py")
             
-            if not os.path.exists(addon_path):
-                logger.error(f"Addon file not found: {addon_path}")
-                return False
+            for path in (addon_path, signals_path, cache_path):
+                if not os.path.exists(path):
+                    logger.error(f"Addon file not found: {path}")
+                    return False
             
             # Try different mitmproxy command variations
             mitmproxy_commands = [
@@ -114,6 +118,8 @@ class EnhancedKhanScraper:
                 try:
                     cmd = cmd_base + [
                         "-s", addon_path,
+                        "-s", signals_path,
+                        "-s", cache_path,
                         "--set", f"listen_port={self.proxy_port}",
                         "--set", "confdir=~/.mitmproxy",
                         "--set", "web_open_browser=false"
@@ -158,7 +164,9 @@ class EnhancedKhanScraper:
         """Start browser automation in a separate thread."""
         def run_automation():
             try:
-                self.browser_automation = KhanAcademyBrowserAutomation(self.proxy_port)
+                self.browser_automation = KhanAcademyBrowserAutomation(
+                    self.proxy_port, interruption_signal_port=SIGNAL_PORT
+                )
                 success = self.browser_automation.automate_exercise_session(
                     exercise_url, 
                     max_questions=max_questions,
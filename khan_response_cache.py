@@ -0,0 +1,117 @@
+"""
+khan_response_cache.py
+mitmproxy addon that answers repeat GETs for cacheable static assets (JS bundles,
+stylesheets) from memory, so navigation retries, page refreshes and freshly
+launched pool browsers don't pull the same bundles from upstream again.
+
+Only responses the origin marks as publicly cacheable are stored, and never
+Khan Academy API traffic, so question capture always sees live responses.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from mitmproxy import http
+
+# --- Configuration ---
+MAX_CACHE_BYTES = 200 * 1024 * 1024  # Evict least recently used entries beyond this
+MAX_ENTRY_BYTES = 20 * 1024 * 1024   # Larger bodies are streamed and never cached
+MAX_TTL_SECONDS = 24 * 60 * 60
+
+# Paths that carry question data or session state; always forwarded
+UNCACHEABLE_PATHS = ("/api/", "/graphql")
+
+MAX_AGE_RE = re.compile(r"(?:s-maxage|max-age)=(\d+)")
+
+# Request headers that are part of the cache key; a Vary on anything else isn't cached
+KEYED_REQUEST_HEADERS = {"accept-encoding"}
+
+
+class StaticResponseCache:
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (expires_at, response)
+        self.size = 0
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def _key(self, flow: http.HTTPFlow) -> tuple:
+        return (flow.request.pretty_url, flow.request.headers.get("accept-encoding", ""))
+
+    def _is_cacheable_request(self, flow: http.HTTPFlow) -> bool:
+        if flow.request.method != "GET":
+            return False
+        path = flow.request.path.lower()
+        return not any(fragment in path for fragment in UNCACHEABLE_PATHS)
+
+    def _ttl(self, response: http.Response) -> int:
+        """Seconds the origin allows this response to be reused from now, or 0."""
+        cache_control = response.headers.get("cache-control", "").lower()
+        if any(d in cache_control for d in ("no-store", "no-cache", "private")):
+            return 0
+        if "set-cookie" in response.headers:
+            return 0
+        # Variants selected by headers outside the key (or "*") could be served to the wrong client
+        vary = {h.strip().lower() for h in response.headers.get("vary", "").split(",") if h.strip()}
+        if vary - KEYED_REQUEST_HEADERS:
+            return 0
+        match = MAX_AGE_RE.search(cache_control)
+        if not match:
+            return 0
+        # max-age counts from when the origin generated it; subtract time already spent in upstream caches
+        try:
+            age = max(0, int(response.headers.get("age", "0")))
+        except ValueError:
+            age = 0
+        return max(0, min(int(match.group(1)) - age, MAX_TTL_SECONDS))
+
+    def request(self, flow: http.HTTPFlow) -> None:
+        """Serve a fresh cached copy instead of forwarding the request."""
+        if not self._is_cacheable_request(flow):
+            return
+        key = self._key(flow)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            expires_at, response = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.size -= len(response.raw_content or b"")
+                return
+            self.entries.move_to_end(key)
+            self.hits += 1
+        flow.response = response.copy()
+        flow.metadata["served_from_cache"] = True
+
+    def response(self, flow: http.HTTPFlow) -> None:
+        """Store publicly cacheable 200 responses to static GETs."""
+        if not self._is_cacheable_request(flow) or flow.response is None:
+            return
+        if flow.metadata.get("served_from_cache"):
+            return
+        if flow.response.status_code != 200 or flow.response.raw_content is None:
+            return
+        body_size = len(flow.response.raw_content)
+        if body_size > MAX_ENTRY_BYTES:
+            return
+        ttl = self._ttl(flow.response)
+        if not ttl:
+            return
+
+        key = self._key(flow)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[1].raw_content or b"")
+            self.entries[key] = (time.monotonic() + ttl, flow.response.copy())
+            self.size += body_size
+            while self.size > self.max_bytes and self.entries:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted.raw_content or b"")
+
+
+# Create the addon instance
+addons = [StaticResponseCache()]
@@ -0,0 +1,120 @@
+"""
+khan_signals.py
+mitmproxy addon that spots exercise interruptions (practice complete, streak
+celebrations) and newly served questions in Khan Academy API traffic and signals
+the browser automation, so the browser no longer has to scan the page for dialogs
+or poll for the next question after every click.
+
+Signals are single UDP datagrams on localhost carrying either the interruption key
+used by KhanAcademyBrowserAutomation.handle_exercise_interruptions or QUESTION_SIGNAL.
+"""
+
+import json
+import queue
+import socket
+import threading
+
+# --- Configuration ---
+SIGNAL_HOST = "127.0.0.1"
+SIGNAL_PORT = 8765
+
+# Lower-cased operation name / path fragments and the interruption they announce
+INTERRUPTION_MARKERS = [
+    ("streak", "streak"),
+    ("completepracticetask", "practice complete"),
+    ("practicetaskcompleted", "practice complete"),
+    ("/api/internal/user/tasks/", "practice complete"),
+]
+
+# GraphQL operations that deliver a question to the browser
+QUESTION_OPERATIONS = {"getassessmentitem", "assessmentitem"}
+QUESTION_SIGNAL = "question"
+
+
+class KhanInterruptionSignals:
+    def __init__(self, host: str = SIGNAL_HOST, port: int = SIGNAL_PORT):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _operation_name(self, flow) -> str:
+        """Return the GraphQL operation name of a request, or an empty string."""
+        try:
+            body = json.loads(flow.request.get_text(strict=False) or "null")
+            if isinstance(body, list) and body:
+                body = body[0]
+            if isinstance(body, dict):
+                return body.get("operationName") or ""
+        except Exception:
+            pass
+        return ""
+
+    def response(self, flow) -> None:
+        """Emit a signal when a Khan Academy response announces an interruption."""
+        if "khanacademy.org" not in flow.request.pretty_host:
+            return
+        if not flow.response or flow.response.status_code != 200:
+            return
+
+        haystack = flow.request.path.lower()
+        if "/api/internal/graphql" in haystack:
+            operation = self._operation_name(flow).lower()
+            if operation in QUESTION_OPERATIONS:
+                self._send(QUESTION_SIGNAL)
+                return
+            haystack += " " + operation
+
+        for marker, kind in INTERRUPTION_MARKERS:
+            if marker in haystack:
+                self._send(kind)
+                return
+
+    def _send(self, kind: str) -> None:
+        try:
+            self.sock.sendto(kind.encode("utf-8"), self.address)
+        except OSError:
+            pass
+
+
+class InterruptionListener:
+    """Receives signals on a background thread.
+
+    Interruptions are queued; question arrivals set the new_question event. The
+    addon sends to one fixed address, so only one listener per host receives signals;
+    binding a second one raises OSError.
+    """
+
+    def __init__(self, host: str = SIGNAL_HOST, port: int = SIGNAL_PORT):
+        self.queue: "queue.Queue[str]" = queue.Queue()
+        self.new_question = threading.Event()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.5)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "InterruptionListener":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=1)
+        self.sock.close()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                data, _ = self.sock.recvfrom(256)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            kind = data.decode("utf-8", errors="ignore")
+            if kind == QUESTION_SIGNAL:
+                self.new_question.set()
+            else:
+                self.queue.put(kind)
+
+
+# Create the addon instance
+addons = [KhanInterruptionSignals()]
@@ -14,6 +14,7 @@ from automate_exercise import run_automation
 
 # --- Configuration ---
 MITM_SCRIPT = "capture_khan_json.py"
+CACHE_SCRIPT = "khan_response_cache.py"
 PROXY_PORT = 8080
 DEFAULT_EXERCISE_URL = "https://www.khanacademy.org/math/cc-2nd-grade-math/x3184e0ec:add-and-subtract-within-20/x3184e0ec:add-within-20/e/add-within-20-visually"
 DEFAULT_MAX_QUESTIONS = 50  # Reduced for initial testing
@@ -48,6 +49,7 @@ def start_mitmproxy():
     mitm_command = [
         "mitmdump",
         "-s", MITM_SCRIPT,
+        "-s", CACHE_SCRIPT,
         "--listen-port", str(PROXY_PORT),
         "--set", "block_global=false",  # Allows traffic to pass through
         "--set", "connection_strategy=lazy",  # Optimize connections
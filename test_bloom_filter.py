@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the scalable Bloom filter used to track seen question IDs.
+"""
+
+import sys
+
+from bloom_filter import BloomFilter, ScalableBloomFilter
+
+
+def test_no_false_negatives_across_growth():
+    """Every added item is still found after the filter has grown several stages."""
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01)
+    items = [f"x{i:016x}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert len(bloom.filters) > 1, "filter should have chained extra stages"
+    assert all(item in bloom for item in items)
+
+
+def test_stage_growth_doubles_capacity_and_halves_error_rate():
+    bloom = ScalableBloomFilter(initial_capacity=50, error_rate=0.01)
+    for i in range(400):
+        bloom.add(f"item-{i}")
+
+    for previous, current in zip(bloom.filters, bloom.filters[1:]):
+        assert current.capacity == previous.capacity * 2
+        assert current.error_rate == previous.error_rate / 2
+
+
+def test_add_skips_present_items():
+    bloom = ScalableBloomFilter(initial_capacity=10, error_rate=0.01)
+    bloom.add("x4199a21da4572c96")
+    bloom.add("x4199a21da4572c96")
+
+    assert len(bloom) == 1
+    assert len(bloom.filters) == 1
+
+
+def test_false_positive_rate_near_error_rate():
+    """Empirical false-positive rate stays close to the requested bound."""
+    error_rate = 0.01
+    bloom = ScalableBloomFilter(initial_capacity=2000, error_rate=error_rate)
+    for i in range(5000):
+        bloom.add(f"seen-{i}")
+
+    trials = 20000
+    false_positives = sum(f"unseen-{i}" in bloom for i in range(trials))
+    # Allow headroom for sampling noise; a broken hash layout lands far above this
+    assert false_positives / trials <= error_rate * 2
+
+
+def test_fixed_filter_false_positive_rate_at_capacity():
+    error_rate = 0.01
+    bloom = BloomFilter(capacity=5000, error_rate=error_rate)
+    for i in range(5000):
+        bloom.add(f"seen-{i}")
+
+    trials = 20000
+    false_positives = sum(f"unseen-{i}" in bloom for i in range(trials))
+    assert false_positives / trials <= error_rate * 2
+
+
+def main():
+    tests = [value for name, value in globals().items() if name.startswith("test_")]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()